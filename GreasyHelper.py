@@ -8,25 +8,61 @@ import subprocess
 import time
 import sys
 import json
+import lzma
+import re
 import signal
+import sqlite3
+import queue
+import random
 import serial.tools.list_ports
 import curses
 import threading
+import collections
+import concurrent.futures
+import gzip
+import hashlib
+import mmap
+import struct
+import shutil
+import tempfile
+import zipfile
+import zlib
+from contextlib import closing
 from pathlib import Path
 from tkinter import Tk, filedialog
 
+try:
+    import numpy
+except ImportError:
+    numpy = None  # Optional: vectorised sector comparison
+
 # Configuration files
 config_file = "gw_config.json"
 operation_log_file = "gw_operations.log"
+queue_file = "gw_queue.json"
+device_cache_file = "gw_device_cache.json"
+template_cache_file = "gw_template_cache.json"
+catalogue_file = "gw_catalogue.db"
+format_probe_file = "gw_probe_cache.json"
 
 # Global variables
 gw_path = ""
 com_port = ""
+com_serial = ""  # USB serial number of the configured device, used to follow it across ports
 drive_type = "B"  # A or B
 target_system = "PC"  # PC, Amiga, Apple, Atari, C64, ZXSpectrum
 default_disk_size = ""  # Default disk size for target system
+flux_compression = "off"  # Background compression of flux captures: off, xz, gzip
+verify_sample_tracks = 24  # Tracks read by a sampled verify
+verify_time_budget = 60  # Seconds a sampled verify may spend reading
 operation_cancelled = False
 current_operation = None
+devices = []  # Device registry: [{"name", "port", "drive_type", "serial"}], empty = single device
+device_cache = None  # USB serial -> last `gw info` result, loaded on first use
+format_probe_cache = None  # "system:tracks:sha1 of the sample" -> gw format, loaded on first use
+hotplug_monitor = None
+config_lock = threading.Lock()
+device_cache_lock = threading.RLock()  # Concurrent `gw info` probes share the device cache
 
 # FIXED: Format profiles with CORRECT Greaseweazle format strings from official Yann Serra Tutorial
 # Each entry: (format_string, template_filename, size_in_bytes)
@@ -49,7 +85,8 @@ format_profiles = {
     },
     "Apple": {
         "400KB (Mac SS)": ("mac.400", "mac400.dsk", 409600),
-        "800KB (Mac DS)": ("mac.800", "mac800.dsk", 819200)
+        "800KB (Mac DS)": ("mac.800", "mac800.dsk", 819200),
+        "1440KB (Mac HD)": ("ibm.1440", "apple1440.dsk", 1474560)
     },
     "Atari": {
         "90KB (Atari 800)": ("atari.90", "atari90.img", 92160),
@@ -84,6 +121,56 @@ format_profiles = {
     }
 }
 
+# Physical geometry per Greaseweazle format string
+# Each entry: (cylinders, heads, sectors_per_track, bytes_per_sector)
+# sectors_per_track is None for zoned GCR formats, see gcr_zones below
+format_geometry = {
+    "ibm.160": (40, 1, 8, 512),
+    "ibm.180": (40, 1, 9, 512),
+    "ibm.320": (40, 2, 8, 512),
+    "ibm.360": (40, 2, 9, 512),
+    "ibm.720": (80, 2, 9, 512),
+    "ibm.800": (80, 2, 10, 512),
+    "ibm.1200": (80, 2, 15, 512),
+    "ibm.1440": (80, 2, 18, 512),
+    "ibm.1680": (80, 2, 21, 512),
+    "ibm.2880": (80, 2, 36, 512),
+    "amiga.amigados": (80, 2, 11, 512),
+    "amiga.amigados_hd": (80, 2, 22, 512),
+    "mac.400": (80, 1, None, 512),
+    "mac.800": (80, 2, None, 512),
+    "atari.90": (40, 1, 18, 128),
+    "atarist.360": (80, 1, 9, 512),
+    "atarist.400": (80, 1, 10, 512),
+    "atarist.440": (80, 1, 11, 512),
+    "atarist.720": (80, 2, 9, 512),
+    "atarist.800": (80, 2, 10, 512),
+    "atarist.880": (80, 2, 11, 512),
+    "commodore.1541": (35, 1, None, 256),
+    "commodore.1571": (35, 2, None, 256),
+    "commodore.1581": (80, 2, 10, 512),
+    "zx.trdos.640": (80, 2, 16, 256),
+    "zx.quorum.800": (80, 2, 5, 1024),
+    "acorn.adfs.160": (40, 1, 16, 256),
+    "acorn.adfs.320": (80, 1, 16, 256),
+    "acorn.adfs.640": (80, 2, 16, 256),
+    "acorn.adfs.800": (80, 2, 5, 1024),
+    "acorn.adfs.1600": (80, 2, 10, 1024),
+    "msx.1d": (40, 1, 9, 512),
+    "msx.2d": (40, 2, 9, 512),
+    "msx.1dd": (80, 1, 9, 512),
+    "msx.2dd": (80, 2, 9, 512)
+}
+
+# Zoned GCR formats: (first_cylinder_of_next_zone, sectors_per_track) per zone
+gcr_zones = {
+    "mac": [(16, 12), (32, 11), (48, 10), (64, 9), (80, 8)],
+    "commodore": [(17, 21), (24, 19), (30, 18), (35, 17)]
+}
+
+# Track count assumed when neither --tracks nor --format pins it down
+default_track_count = 160
+
 # System descriptions for help
 system_descriptions = {
     "PC": "IBM PC Compatible (DOS/Windows)",
@@ -111,17 +198,17 @@ file_extensions = {
     },
     "Amiga": {
         "read": [("Amiga Images", "*.adf"), ("Compressed ADF", "*.adz"), ("All", "*.*")],
-        "write": [("Amiga Images", "*.adf"), ("All", "*.*")],
+        "write": [("Amiga Images", "*.adf"), ("Compressed ADF", "*.adz"), ("All", "*.*")],
         "default_ext": ".adf"
     },
     "Apple": {
         "read": [("Apple Images", "*.dsk"), ("Apple 2MG", "*.2mg"), ("ProDOS", "*.po"), ("All", "*.*")],
-        "write": [("Apple Images", "*.dsk"), ("All", "*.*")],
+        "write": [("Apple Images", "*.dsk"), ("DiskCopy 4.2", "*.image"), ("Apple 2MG", "*.2mg"), ("All", "*.*")],
         "default_ext": ".dsk"
     },
     "Atari": {
         "read": [("Atari Images", "*.st"), ("MSA Archives", "*.msa"), ("DIM Images", "*.dim"), ("All", "*.*")],
-        "write": [("Atari Images", "*.st"), ("All", "*.*")],
+        "write": [("Atari Images", "*.st"), ("MSA Archives", "*.msa"), ("DIM Images", "*.dim"), ("All", "*.*")],
         "default_ext": ".st"
     },
     "C64": {
@@ -157,6 +244,8 @@ menu_items = [
     ("5", "Verify Disk", "Check disk integrity with read-back"),
     ("6", "Disk Status", "Show drive and disk information"),
     ("7", "Repair Disk", "Complete disk recovery sequence"),
+    ("Q", "Job Queue", "Batch operations that resume after restart"),
+    ("C", "Catalogue", "Search every backup, write and verify"),
     ("", "", ""),  # Spacer
     ("H", "Help Topics", "Browse help and documentation"),
     ("0", "Exit", "Quit the program")
@@ -181,6 +270,16 @@ COLOR_PANEL_BORDER = 8
 COLOR_HELP_TEXT = 9
 COLOR_WARNING = 10
 
+# Track heat-map cells: status -> (character, colour pair), drawn under the output
+HEATMAP_CELLS = {
+    None: ("·", COLOR_OUTPUT_NORMAL),
+    "ok": ("█", COLOR_OUTPUT_SUCCESS),
+    "retried": ("▓", COLOR_WARNING),
+    "missing": ("▒", COLOR_WARNING),
+    "unreadable": ("X", COLOR_OUTPUT_ERROR),
+}
+HEATMAP_MIN_OUTPUT_LINES = 4  # Output lines kept visible above the heat-map
+
 def log_operation(operation, result, details=""):
     """Log operations to file with timestamp"""
     timestamp = time.strftime("%Y-%m-%d %H:%M:%S")
@@ -196,24 +295,41 @@ def log_operation(operation, result, details=""):
 
 def save_config():
     """Save configuration to JSON file"""
+    global com_serial
+    
+    # Remember USB serial numbers so the hotplug monitor can follow replugs
+    try:
+        serials = {port.device: port.serial_number for port in serial.tools.list_ports.comports()}
+    except Exception:
+        serials = {}
+    com_serial = serials.get(com_port) or com_serial
+    for device in devices:
+        device["serial"] = serials.get(device["port"]) or device.get("serial", "")
+    
     config_data = {
         "gw_path": gw_path,
         "com_port": com_port,
+        "com_serial": com_serial,
         "drive_type": drive_type,
         "target_system": target_system,
         "default_disk_size": default_disk_size,
+        "flux_compression": flux_compression,
+        "verify_sample_tracks": verify_sample_tracks,
+        "verify_time_budget": verify_time_budget,
+        "devices": devices,
         "setup_completed": True
     }
     
     try:
-        with open(config_file, "w") as f:
+        with config_lock, open(config_file, "w") as f:
             json.dump(config_data, f, indent=2)
     except Exception:
         pass  # Silent fail for config save
 
 def load_config():
     """Load configuration from JSON file"""
-    global gw_path, com_port, drive_type, target_system, default_disk_size
+    global gw_path, com_port, com_serial, drive_type, target_system, default_disk_size, devices
+    global flux_compression, verify_sample_tracks, verify_time_budget
     
     if os.path.exists(config_file):
         try:
@@ -221,9 +337,14 @@ def load_config():
                 cfg = json.load(f)
                 gw_path = cfg.get("gw_path", "")
                 com_port = cfg.get("com_port", "")
+                com_serial = cfg.get("com_serial", "")
                 drive_type = cfg.get("drive_type", "B")
                 target_system = cfg.get("target_system", "PC")
                 default_disk_size = cfg.get("default_disk_size", "")
+                flux_compression = cfg.get("flux_compression", "off")
+                verify_sample_tracks = cfg.get("verify_sample_tracks", 24)
+                verify_time_budget = cfg.get("verify_time_budget", 60)
+                devices = cfg.get("devices", [])
                 return cfg.get("setup_completed", False)
         except Exception:
             # Use defaults if config is corrupted
@@ -237,23 +358,810 @@ def get_available_formats():
         return format_profiles[target_system]
     return {}
 
-def get_template_path(format_name):
-    """Get path to template file for current system and format"""
-    formats = get_available_formats()
-    if format_name in formats:
-        fmt, filename, size = formats[format_name]
-        template_path = os.path.join("templates", filename)
-        
-        if os.path.exists(template_path):
-            # Verify file size matches expected
-            actual_size = os.path.getsize(template_path)
-            if actual_size == size:
-                return template_path
-    return None
+# Template folder index: one scandir per change of the folder instead of a
+# stat per format on every menu redraw
+TEMPLATE_DIR = "templates"
+TEMPLATE_STAT_INTERVAL = 1.0  # Seconds between checks of the folder mtime
+
+class TemplateIndex:
+    """Sizes and checksums of the files in the templates folder"""
+    
+    def __init__(self, directory):
+        self.directory = directory
+        self.files = {}  # filename -> (size, mtime_ns)
+        self.checksums = {}  # (filename, size, mtime_ns) -> sha256 hex
+        self.dir_mtime = None
+        self.last_check = 0
+        self.lock = threading.Lock()
+        self.candidates = None  # Discovered templates, built on first match()
+        self.matches = {}  # (fmt, filename, size) -> TemplateCandidate or None
+    
+    def refresh(self, force=False):
+        """Rescan the folder if its mtime changed (checked at most once per interval)"""
+        now = time.monotonic()
+        if not force and now - self.last_check < TEMPLATE_STAT_INTERVAL:
+            return
+        self.last_check = now
+        
+        try:
+            dir_mtime = os.stat(self.directory).st_mtime_ns
+        except OSError:
+            dir_mtime = None
+        if dir_mtime == self.dir_mtime and not force:
+            return
+        
+        files = {}
+        if dir_mtime is not None:
+            try:
+                with os.scandir(self.directory) as entries:
+                    for entry in entries:
+                        if entry.is_file():
+                            stat = entry.stat()
+                            files[entry.name] = (stat.st_size, stat.st_mtime_ns)
+            except OSError:
+                pass
+        
+        with self.lock:
+            self.files = files
+            self.dir_mtime = dir_mtime
+            self.candidates = None
+            self.matches = {}
+    
+    def size(self, filename):
+        """Size of a template file, None if missing"""
+        self.refresh()
+        entry = self.files.get(filename)
+        return entry[0] if entry else None
+    
+    def path(self, filename, expected_size=None):
+        """Path of a template file, None if missing or not the expected size"""
+        size = self.size(filename)
+        if size is None or (expected_size is not None and size != expected_size):
+            return None
+        return os.path.join(self.directory, filename)
+    
+    def match(self, fmt, filename, size, system=None):
+        """Discovered template for a format profile entry, or None"""
+        self.refresh()
+        key = (fmt, filename, size, system)
+        with self.lock:
+            if key not in self.matches:
+                if self.candidates is None:
+                    self.candidates = discover_templates(self)
+                self.matches[key] = match_template(self.candidates, fmt, filename, size, system)
+            return self.matches[key]
+    
+    def checksum(self, filename):
+        """SHA-256 of a template file, computed once per file version"""
+        self.refresh()
+        entry = self.files.get(filename)
+        if not entry:
+            return None
+        key = (filename,) + entry
+        if key not in self.checksums:
+            digest = hashlib.sha256()
+            try:
+                with open(os.path.join(self.directory, filename), "rb") as f:
+                    for block in iter(lambda: f.read(1024 * 1024), b""):
+                        digest.update(block)
+            except OSError:
+                return None
+            self.checksums[key] = digest.hexdigest()
+        return self.checksums[key]
+
+template_index = TemplateIndex(TEMPLATE_DIR)
+
+# Content-based template discovery: every file in templates/ (and inside any
+# zip there) is classified by size and boot sector, so templates are found
+# whatever they are called. Classifications are cached in template_cache_file.
+TEMPLATE_HEADER_BYTES = 2048
+
+# Boot sector signatures each gw format family accepts, None = any image of the right size
+format_family_signatures = {
+    "ibm": {"fat"},
+    "msx": {"fat"},
+    "atarist": {"atari", "fat"},
+    "amiga": {"amigados"},
+    "mac": {"hfs", "mfs"},
+    "commodore": {"cbm"},
+    "atari": None,
+    "zx": None,
+    "acorn": None
+}  # None = only images without a recognised boot sector
+
+# Systems whose templates use another family's gw format (Mac HD disks are IBM MFM)
+system_signatures = {
+    "Apple": {"hfs", "mfs"}
+}
+
+cbm_image_sizes = [174848, 175531, 349696, 351062]  # D64/D71, with and without error bytes
+
+def classify_template(header, size):
+    """Identify an image by its first sectors, returns a signature name"""
+    if header[:3] == b"DOS":
+        return "amigados"
+    if header[:2] == b"\x4e\x71" or header[:1] == b"\x60":
+        return "atari"
+    if header[:1] in (b"\xeb", b"\xe9") and header[510:512] == b"\x55\xaa":
+        return "fat"
+    if header[0x400:0x402] == b"BD":
+        return "hfs"
+    if header[0x400:0x402] == b"\xd2\xd7":
+        return "mfs"
+    if size in cbm_image_sizes:
+        return "cbm"
+    return "raw"
+
+class TemplateCandidate(collections.namedtuple("TemplateCandidate", "name member size signature")):
+    """A discovered template: a loose file, or a member of the zip called name"""
+    
+    def label(self):
+        return f"{self.name}:{self.member}" if self.member else self.name
+
+def template_signature_cache():
+    """Classifications from previous runs, keyed by file identity"""
+    try:
+        with open(template_cache_file, "r") as f:
+            return json.load(f)
+    except Exception:
+        return {}
+
+def discover_templates(index):
+    """Classify every template file and zip member in the index"""
+    known = template_signature_cache()
+    cache = dict(known)
+    seen = {}
+    candidates = []
+    
+    for name, (size, mtime) in sorted(index.files.items()):
+        path = os.path.join(index.directory, name)
+        if name.lower().endswith(".zip"):
+            try:
+                with zipfile.ZipFile(path) as archive:
+                    for member in archive.infolist():
+                        if member.is_dir():
+                            continue
+                        key = f"{name}:{size}:{mtime}/{member.filename}:{member.CRC}"
+                        if key not in cache:
+                            with archive.open(member) as f:
+                                cache[key] = classify_template(f.read(TEMPLATE_HEADER_BYTES), member.file_size)
+                        seen[key] = cache[key]
+                        candidates.append(TemplateCandidate(name, member.filename, member.file_size, cache[key]))
+            except (OSError, zipfile.BadZipFile):
+                pass
+            continue
+        
+        key = f"{name}:{size}:{mtime}"
+        if key not in cache:
+            try:
+                with open(path, "rb") as f:
+                    cache[key] = classify_template(f.read(TEMPLATE_HEADER_BYTES), size)
+            except OSError:
+                continue
+        seen[key] = cache[key]
+        candidates.append(TemplateCandidate(name, None, size, cache[key]))
+        
+        if size not in known_image_sizes():
+            # Raw image followed by filler (e.g. apple1440.dsk), served trimmed
+            try:
+                with open(path, "rb") as f:
+                    image_size = trailing_filler_size(f, size)
+            except OSError:
+                image_size = None
+            if image_size:
+                candidates.append(TemplateCandidate(name, None, image_size, cache[key]))
+    
+    # Only keep entries for files still present
+    if seen != known:
+        try:
+            with open(template_cache_file, "w") as f:
+                json.dump(seen, f, indent=2)
+        except Exception:
+            pass  # Silent fail, discovery just reruns next time
+    return candidates
+
+def match_template(candidates, fmt, filename, size, system=None):
+    """Pick the best candidate for a format profile entry, or None"""
+    accepted = system_signatures.get(system) or format_family_signatures.get(fmt.split(".")[0])
+    extension = os.path.splitext(filename)[1].lower()
+    
+    def compatible(candidate):
+        if candidate.size != size:
+            return False
+        if accepted is None:
+            # No known boot sector: never use another system's filesystem
+            return candidate.signature == "raw"
+        if candidate.signature in accepted:
+            return True
+        # Unrecognised boot sector (e.g. blank image): trust the extension
+        return candidate.signature == "raw" and os.path.splitext(candidate.label())[1].lower() == extension
+    
+    def rank(candidate):
+        base = os.path.basename(candidate.member or candidate.name)
+        return (base != filename,
+                os.path.splitext(base)[1].lower() != extension,
+                candidate.member is not None,
+                base)
+    
+    matches = sorted(filter(compatible, candidates), key=rank)
+    return matches[0] if matches else None
+
+def find_template(format_name, system=None):
+    """Locate the template for a format without extracting anything"""
+    formats = format_profiles.get(system, {}) if system else get_available_formats()
+    if format_name not in formats:
+        return None
+    fmt, filename, size = formats[format_name]
+    return template_index.match(fmt, filename, size, system or target_system)
+
+def template_available(format_name, system=None):
+    """True if a template exists for the format or can be synthesised"""
+    if find_template(format_name, system) is not None:
+        return True
+    formats = format_profiles.get(system, {}) if system else get_available_formats()
+    return format_name in formats and can_synthesize(formats[format_name][0])
+
+# Zip members are decompressed on demand into a small LRU cache, in memory
+# backed /dev/shm where available, so templates.zip never needs unpacking.
+# Files handed out by this process are never pruned while it runs, since a
+# device worker may still be about to write one
+TEMPLATE_CACHE_ENTRIES = 4
+template_cache_in_use = set()
+template_cache_lock = threading.Lock()
+
+def template_cache_dir():
+    """Folder for decompressed templates, preferring a memory-backed filesystem"""
+    for base in ("/dev/shm", tempfile.gettempdir()):
+        if os.path.isdir(base) and os.access(base, os.W_OK):
+            return os.path.join(base, "gw_helper_cache")
+    return os.path.join(tempfile.gettempdir(), "gw_helper_cache")
+
+def use_cached_template(path):
+    """Mark a cache file as most recently used and in use by this process, False if it is gone"""
+    with template_cache_lock:
+        if not os.path.exists(path):
+            return False
+        template_cache_in_use.add(path)
+    os.utime(path)
+    return True
+
+def store_cached_template(temp_path, target):
+    """Move a finished file into the cache as in use, then prune the cache"""
+    with template_cache_lock:
+        template_cache_in_use.add(target)
+        os.replace(temp_path, target)
+    prune_template_cache(os.path.dirname(target), target)
+
+def prune_template_cache(cache_dir, keep):
+    """Delete least recently used templates beyond the LRU size (files in use are never removed)"""
+    with template_cache_lock:
+        template_cache_in_use.add(keep)
+        try:
+            entries = [entry for entry in os.scandir(cache_dir)
+                       if entry.is_file() and entry.path not in template_cache_in_use
+                       and not entry.name.endswith(".tmp")]
+        except OSError:
+            return
+        entries.sort(key=lambda entry: entry.stat().st_mtime, reverse=True)
+        for entry in entries[max(0, TEMPLATE_CACHE_ENTRIES - len(template_cache_in_use)):]:
+            try:
+                os.remove(entry.path)
+            except OSError:
+                pass
+
+def extract_template(candidate):
+    """Decompress a zip member into the template cache, returns its path"""
+    cache_dir = template_cache_dir()
+    with zipfile.ZipFile(os.path.join(template_index.directory, candidate.name)) as archive:
+        member = archive.getinfo(candidate.member)
+        target = os.path.join(cache_dir, f"{member.CRC:08x}_{os.path.basename(member.filename)}")
+        
+        if (os.path.exists(target) and os.path.getsize(target) == member.file_size
+                and use_cached_template(target)):
+            return target
+        
+        os.makedirs(cache_dir, exist_ok=True)
+        temp_target = f"{target}.{os.getpid()}.tmp"
+        with archive.open(member) as source, open(temp_target, "wb") as f:
+            while True:
+                block = source.read(1024 * 1024)
+                if not block:
+                    break
+                f.write(block)
+    store_cached_template(temp_target, target)
+    return target
+
+# Blank image synthesis: a freshly formatted filesystem for formats without a
+# template file, built in memory and cached per format
+# FAT12 parameters per format: (sectors_per_cluster, root_entries, media_byte)
+fat12_parameters = {
+    "ibm.160": (1, 64, 0xFE),
+    "ibm.180": (1, 64, 0xFC),
+    "ibm.320": (2, 112, 0xFF),
+    "ibm.360": (2, 112, 0xFD),
+    "ibm.720": (2, 112, 0xF9),
+    "ibm.800": (2, 112, 0xF9),
+    "ibm.1200": (1, 224, 0xF9),
+    "ibm.1440": (1, 224, 0xF0),
+    "ibm.1680": (4, 16, 0xF0),
+    "ibm.2880": (2, 240, 0xF0),
+    "atarist.360": (2, 112, 0xF8),
+    "atarist.400": (2, 112, 0xF8),
+    "atarist.440": (2, 112, 0xF8),
+    "atarist.720": (2, 112, 0xF9),
+    "atarist.800": (2, 112, 0xF9),
+    "atarist.880": (2, 112, 0xF9),
+    "msx.1d": (1, 64, 0xFC),
+    "msx.2d": (2, 112, 0xFD),
+    "msx.1dd": (2, 112, 0xF8),
+    "msx.2dd": (2, 112, 0xF9)
+}
+
+blank_images = {}  # gw format -> synthesised image bytes
+
+def fat12_sectors_per_fat(total_sectors, spc, root_entries, bps=512, reserved=1, fats=2):
+    """Smallest FAT12 size that can map every cluster of the volume"""
+    root_sectors = (root_entries * 32 + bps - 1) // bps
+    sectors_per_fat = 1
+    while True:
+        data_sectors = total_sectors - reserved - fats * sectors_per_fat - root_sectors
+        clusters = data_sectors // spc
+        if (clusters + 2) * 3 // 2 + 1 <= sectors_per_fat * bps:
+            return sectors_per_fat
+        sectors_per_fat += 1
+
+def synthesize_fat12(fmt):
+    """Blank FAT12 volume for PC, Atari ST and MSX formats"""
+    cyls, heads, spt, bps = format_geometry[fmt]
+    spc, root_entries, media = fat12_parameters[fmt]
+    total_sectors = cyls * heads * spt
+    sectors_per_fat = fat12_sectors_per_fat(total_sectors, spc, root_entries, bps)
+    image = bytearray(total_sectors * bps)
+    
+    family = fmt.split(".")[0]
+    if family == "atarist":
+        # BRA.S over the BPB, OEM name and 24-bit serial number
+        image[0:11] = b"\x60\x38GWHELP" + os.urandom(3)
+    elif family == "msx":
+        image[0:11] = b"\xeb\xfe\x90GWHELPER"
+    else:
+        image[0:11] = b"\xeb\x3c\x90MSDOS5.0"
+    
+    image[11:30] = struct.pack("<HBHBHHBHHHH", bps, spc, 1, 2, root_entries, total_sectors,
+                               media, sectors_per_fat, spt, heads, 0)
+    
+    if family == "atarist":
+        # Keep the boot sector non-executable (word sum must not be 0x1234)
+        while sum(struct.unpack(">256H", image[:512])) & 0xFFFF == 0x1234:
+            image[8:11] = os.urandom(3)
+    else:
+        image[36:62] = (b"\x00\x00\x29" + os.urandom(4) + b"NO NAME    FAT12   ")
+        image[62:64] = b"\xcd\x18"  # INT 18h: not a system disk, try the next boot device
+        image[510:512] = b"\x55\xaa"
+    
+    for fat in range(2):
+        offset = (1 + fat * sectors_per_fat) * bps
+        image[offset:offset + 3] = bytes([media, 0xFF, 0xFF])
+    return bytes(image)
+
+def amiga_checksum(block, offset):
+    """Store the AmigaDOS block checksum at offset so all longs sum to zero"""
+    struct.pack_into(">I", block, offset, 0)
+    total = sum(struct.unpack(f">{len(block) // 4}I", block))
+    struct.pack_into(">I", block, offset, -total & 0xFFFFFFFF)
+
+def synthesize_amigados(fmt):
+    """Blank AmigaDOS (OFS) volume: bootblock, rootblock and bitmap"""
+    cyls, heads, spt, bps = format_geometry[fmt]
+    total_blocks = cyls * heads * spt
+    root = total_blocks // 2
+    image = bytearray(total_blocks * bps)
+    
+    # Non-bootable bootblock pointing at the rootblock
+    image[0:12] = b"DOS\x00" + struct.pack(">II", 0, root)
+    
+    # AmigaDOS dates count days since 1978-01-01, minutes and 1/50 s ticks
+    now = time.time() - time.timezone
+    days, seconds = divmod(int(now) - 252460800, 86400)
+    stamp = struct.pack(">III", days, seconds // 60, (seconds % 60) * 50)
+    
+    block = bytearray(bps)
+    struct.pack_into(">I", block, 0, 2)  # T_HEADER
+    struct.pack_into(">I", block, 12, (bps // 4) - 56)  # Hash table size
+    struct.pack_into(">i", block, bps - 200, -1)  # Bitmap valid
+    struct.pack_into(">I", block, bps - 196, root + 1)  # First bitmap page
+    name = b"Empty"
+    block[bps - 92:bps - 80] = stamp
+    block[bps - 80] = len(name)
+    block[bps - 79:bps - 79 + len(name)] = name
+    block[bps - 40:bps - 28] = stamp
+    block[bps - 28:bps - 16] = stamp
+    struct.pack_into(">I", block, bps - 4, 1)  # ST_ROOT
+    amiga_checksum(block, 20)
+    image[root * bps:(root + 1) * bps] = block
+    
+    # Bitmap: one bit per block from block 2, set = free
+    bitmap = bytearray(bps)
+    free = [1] * ((total_blocks + 29) // 32 * 32)  # Bits past the last block stay set
+    free[root - 2] = free[root - 1] = 0
+    for i in range(0, len(free), 32):
+        bits = sum(bit << n for n, bit in enumerate(free[i:i + 32]))
+        struct.pack_into(">I", bitmap, 4 + i // 8, bits)
+    amiga_checksum(bitmap, 0)
+    image[(root + 1) * bps:(root + 2) * bps] = bitmap
+    return bytes(image)
+
+def cbm_track_sectors(track):
+    """Sectors on a 1541/1571 track (tracks 36-70 are the 1571's second side)"""
+    track = track - 35 if track > 35 else track
+    for last_track, sectors in gcr_zones["commodore"]:
+        if track <= last_track:
+            return sectors
+    return 0
+
+def cbm_bam_entry(sectors, used=(), width=3):
+    """Free count plus free-sector bitmap for one CBM track"""
+    bits = sum(1 << s for s in range(sectors) if s not in used)
+    return bytes([sectors - len(used)]) + bits.to_bytes(width, "little")
+
+def cbm_header(name, disk_id, dos_type, padding=2):
+    """Disk name, ID and DOS type as stored in the CBM header sector"""
+    return (name.encode("ascii")[:16].ljust(16, b"\xa0") + b"\xa0\xa0"
+            + disk_id + b"\xa0" + dos_type + b"\xa0" * padding)
+
+def synthesize_cbm(fmt):
+    """Blank CBM DOS disk: BAM and empty directory for 1541, 1571 and 1581"""
+    if fmt == "commodore.1581":
+        image = bytearray(80 * 40 * 256)
+        header = 39 * 40 * 256
+        image[header:header + 4] = b"\x28\x03\x44\x00"
+        image[header + 4:header + 0x1d] = cbm_header("BLANK", b"GW", b"3D")
+        for bam_sector, first_track, link in ((1, 1, b"\x28\x02"), (2, 41, b"\x00\xff")):
+            bam = header + bam_sector * 256
+            image[bam:bam + 8] = link + b"\x44\xbbGW\xc0\x00"
+            for i, track in enumerate(range(first_track, first_track + 40)):
+                used = range(4) if track == 40 else ()
+                image[bam + 0x10 + i * 6:bam + 0x16 + i * 6] = cbm_bam_entry(40, used, 5)
+        image[header + 3 * 256:header + 3 * 256 + 2] = b"\x00\xff"
+        return bytes(image)
+    
+    tracks = 70 if fmt == "commodore.1571" else 35
+    offsets = [0]
+    for track in range(1, tracks + 1):
+        offsets.append(offsets[-1] + cbm_track_sectors(track) * 256)
+    image = bytearray(offsets[-1])
+    
+    bam = offsets[17]  # Track 18 sector 0
+    image[bam:bam + 4] = b"\x12\x01\x41" + (b"\x80" if tracks == 70 else b"\x00")
+    for track in range(1, 36):
+        used = (0, 1) if track == 18 else ()
+        image[bam + track * 4:bam + track * 4 + 4] = cbm_bam_entry(cbm_track_sectors(track), used)
+    image[bam + 0x90:bam + 0xab] = cbm_header("BLANK", b"GW", b"2A", 4)
+    
+    if tracks == 70:
+        # Second side: free counts in 18/0, bitmaps in 53/0 (track 53 reserved)
+        bam2 = offsets[52]
+        for i, track in enumerate(range(36, 71)):
+            used = range(cbm_track_sectors(track)) if track == 53 else ()
+            entry = cbm_bam_entry(cbm_track_sectors(track), used)
+            image[bam + 0xdd + i] = entry[0]
+            image[bam2 + i * 3:bam2 + i * 3 + 3] = entry[1:]
+    
+    image[bam + 256:bam + 258] = b"\x00\xff"  # Empty directory at 18/1
+    return bytes(image)
+
+def synthesize_blank_image(fmt):
+    """Blank formatted image for a gw format, None if it can't be synthesised"""
+    if fmt not in blank_images:
+        if fmt in fat12_parameters:
+            blank_images[fmt] = synthesize_fat12(fmt)
+        elif fmt.startswith("amiga."):
+            blank_images[fmt] = synthesize_amigados(fmt)
+        elif fmt.startswith("commodore."):
+            blank_images[fmt] = synthesize_cbm(fmt)
+        else:
+            return None
+    return blank_images[fmt]
+
+def can_synthesize(fmt):
+    """True if a blank image can be built for the gw format"""
+    return fmt in fat12_parameters or fmt.startswith(("amiga.", "commodore."))
+
+def blank_template_path(fmt, filename, size):
+    """Write the synthesised image for fmt into the template cache, returns its path"""
+    image = synthesize_blank_image(fmt)
+    if image is None or len(image) != size:
+        return None
+    
+    cache_dir = template_cache_dir()
+    target = os.path.join(cache_dir, f"blank_{fmt}{os.path.splitext(filename)[1]}")
+    if not (os.path.exists(target) and os.path.getsize(target) == size and use_cached_template(target)):
+        os.makedirs(cache_dir, exist_ok=True)
+        with open(target + ".tmp", "wb") as f:
+            f.write(image)
+        store_cached_template(target + ".tmp", target)
+    return target
+
+def get_template_path(format_name, system=None):
+    """Get path to template file for current system and format, synthesising a blank one if needed"""
+    candidate = find_template(format_name, system)
+    if not candidate:
+        formats = format_profiles.get(system, {}) if system else get_available_formats()
+        if format_name in formats and can_synthesize(formats[format_name][0]):
+            try:
+                return blank_template_path(*formats[format_name])
+            except OSError:
+                return None
+        return None
+    try:
+        if candidate.member:
+            return decode_image(extract_template(candidate))
+        return decode_image(os.path.join(template_index.directory, candidate.name))
+    except (OSError, EOFError, ValueError, struct.error, zipfile.BadZipFile):
+        return None
+
+# Per-thread device override, set by DeviceWorker threads
+device_context = threading.local()
+
+def active_port():
+    """Get COM port for Greaseweazle commands (worker device or configured port)"""
+    return getattr(device_context, "port", None) or com_port
 
 def drive_arg():
     """Get drive argument for Greaseweazle commands"""
-    return ["--drive", "0" if drive_type == "A" else "1"]
+    drive = getattr(device_context, "drive_type", None) or drive_type
+    return ["--drive", "0" if drive == "A" else "1"]
+
+scratch_folder = None  # This process's scratch folder, created on first use
+scratch_lock = threading.Lock()
+
+def scratch_dir():
+    """Private folder for throw-away reads, memory-backed where possible and never the working directory"""
+    global scratch_folder
+    with scratch_lock:
+        if scratch_folder is None:
+            base = os.path.dirname(template_cache_dir())
+            scratch_folder = tempfile.mkdtemp(prefix="gw_helper_", dir=base)
+    return scratch_folder
+
+def remove_scratch_dir():
+    """Delete this process's scratch folder and whatever is left in it"""
+    if scratch_folder:
+        shutil.rmtree(scratch_folder, ignore_errors=True)
+
+def temp_file_name(base, ext):
+    """Temp file path in the scratch folder, unique per worker device"""
+    name = getattr(device_context, "name", None)
+    return os.path.join(scratch_dir(), f"{base}_{name}{ext}" if name else f"{base}{ext}")
+
+def get_devices():
+    """Get the device registry, falling back to the single configured device"""
+    if devices:
+        return devices
+    if com_port:
+        return [{"name": "GW1", "port": com_port, "drive_type": drive_type}]
+    return []
+
+# Hardware probing: USB identity of the Greaseweazle (pid.codes VID) and
+# limits for the concurrent `gw info` scan
+GW_USB_VID = 0x1209
+GW_USB_PID = 0x4D69
+PROBE_TIMEOUT = 5
+PROBE_MAX_WORKERS = 16
+
+def port_names(port):
+    """Manufacturer, product and description of a port, lower case"""
+    return " ".join(filter(None, [port.manufacturer, port.product, port.description])).lower()
+
+def is_greaseweazle_port(port):
+    """True if a port's name or USB ID says it is a Greaseweazle"""
+    return "greaseweazle" in port_names(port) or (port.vid, port.pid) == (GW_USB_VID, GW_USB_PID)
+
+def port_skip_reason(port):
+    """Check ListPortInfo metadata, returns why a port can't be a Greaseweazle or None to probe it"""
+    if is_greaseweazle_port(port):
+        return None
+    if port.vid is not None:
+        return f"USB {port.vid:04X}:{port.pid or 0:04X}"
+    
+    names = port_names(port)
+    hwid = (port.hwid or "").lower()
+    if "bluetooth" in names or "bthenum" in hwid:
+        return "Bluetooth"
+    if hwid in ("", "n/a"):
+        return "Not a USB device"
+    return None
+
+def port_skip_reasons(ports):
+    """{device: skip reason or None} for a scan
+    
+    Compatible boards (e.g. Adafruit Floppy) use other USB IDs, so when no
+    port has the Greaseweazle ID every USB port is probed.
+    """
+    reasons = {port.device: port_skip_reason(port) for port in ports}
+    if not any(is_greaseweazle_port(port) for port in ports):
+        for port in ports:
+            if port.vid is not None:
+                reasons[port.device] = None
+    return reasons
+
+def probe_port(device, serial=None, save=True):
+    """Check one port for a Greaseweazle, True if one answered (or is cached under its serial)"""
+    return read_device_info(device, serial, save=save) is not None
+
+# Device identity cache: `gw info` results keyed by USB serial number, so a
+# known device is recognised from comports() alone, without spawning gw
+HOTPLUG_INTERVAL = 2  # Seconds between comports() polls
+
+def get_device_cache():
+    """Load the device cache on first use"""
+    global device_cache
+    with device_cache_lock:
+        if device_cache is None:
+            device_cache = {}
+            try:
+                with open(device_cache_file, "r") as f:
+                    device_cache = json.load(f)
+            except Exception:
+                pass  # Missing or corrupted cache, rebuilt by the next probe
+    return device_cache
+
+def save_device_cache():
+    """Write the device cache to disk atomically"""
+    with device_cache_lock:
+        temp_path = device_cache_file + ".tmp"
+        try:
+            with open(temp_path, "w") as f:
+                json.dump(get_device_cache(), f, indent=2)
+            os.replace(temp_path, device_cache_file)
+        except Exception:
+            pass  # Silent fail, the cache is only an optimisation
+
+def port_serial(device):
+    """USB serial number of a COM port, empty if unknown or not connected"""
+    if not device:
+        return ""
+    try:
+        for port in serial.tools.list_ports.comports():
+            if port.device == device:
+                return port.serial_number or ""
+    except Exception:
+        pass
+    return ""
+
+def parse_gw_info(output):
+    """Pick model, firmware and serial out of `gw info` output"""
+    info = {}
+    for line in output.splitlines():
+        key, sep, value = line.strip().partition(":")
+        if sep and key.lower() in ("model", "firmware", "serial") and value.strip():
+            info[key.lower()] = value.strip()
+    return info
+
+def read_device_info(device, serial=None, refresh=False, save=True):
+    """Identify the Greaseweazle on a port, returns its cache entry or None
+    
+    With a known USB serial the cached result is reused unless refresh is set.
+    Concurrent probes pass save=False and save the cache once they are all done.
+    """
+    cache = get_device_cache()
+    with device_cache_lock:
+        if serial and serial in cache and not refresh:
+            cache[serial]["port"] = device
+            return cache[serial]
+    
+    try:
+        result = subprocess.run([gw_path, "info", "--device", device],
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+            timeout=PROBE_TIMEOUT, text=True)
+    except subprocess.TimeoutExpired:
+        return None
+    except Exception:
+        return None
+    
+    # FIXED: Better Greaseweazle detection based on official patterns
+    output_text = (result.stdout + result.stderr).lower()
+    if not (any(keyword in output_text for keyword in [
+        "greaseweazle", "f7", "f1", "firmware", "flux"
+    ]) or result.returncode == 0):
+        return None
+    
+    entry = parse_gw_info(result.stdout)
+    entry.update({
+        "port": device,
+        "info": [line for line in result.stdout.strip().split('\n') if line.strip()],
+        "checked": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "working": result.returncode == 0
+    })
+    if serial:
+        with device_cache_lock:
+            cache[serial] = entry
+        if save:
+            save_device_cache()
+    return entry
+
+class HotplugMonitor(threading.Thread):
+    """Polls comports() and follows configured devices to their new port after a replug"""
+    
+    def __init__(self):
+        super().__init__(daemon=True)
+        self.connected = True
+        self.last_event = ""
+        self.stop_event = threading.Event()
+    
+    def run(self):
+        while not self.stop_event.wait(HOTPLUG_INTERVAL):
+            try:
+                self.check_ports()
+            except Exception:
+                pass  # comports() can fail transiently while devices enumerate
+    
+    def check_ports(self):
+        """Compare the current ports with the configuration and remap moved devices"""
+        global com_port
+        
+        ports = serial.tools.list_ports.comports()
+        by_serial = {port.serial_number: port.device for port in ports if port.serial_number}
+        changed = False
+        
+        if com_serial:
+            self.connected = com_serial in by_serial
+            new_port = by_serial.get(com_serial)
+            if new_port and new_port != com_port:
+                self.remapped("Configured device", com_port, new_port)
+                com_port = new_port
+                changed = True
+        else:
+            self.connected = not com_port or any(port.device == com_port for port in ports)
+        
+        for device in devices:
+            new_port = by_serial.get(device.get("serial"))
+            if new_port and new_port != device["port"]:
+                self.remapped(device["name"], device["port"], new_port)
+                device["port"] = new_port
+                changed = True
+        
+        if changed:
+            save_config()
+    
+    def remapped(self, name, old_port, new_port):
+        """Record a port change"""
+        self.last_event = f"{name} moved {old_port} → {new_port}"
+        log_operation("Hotplug", "REMAPPED", self.last_event)
+
+def start_hotplug_monitor():
+    """Start the background hotplug monitor once"""
+    global hotplug_monitor
+    if hotplug_monitor is None:
+        hotplug_monitor = HotplugMonitor()
+        hotplug_monitor.start()
+    return hotplug_monitor
+
+def device_connected():
+    """True unless the hotplug monitor saw the configured device disappear"""
+    return bool(com_port) and (hotplug_monitor is None or hotplug_monitor.connected)
+
+def get_format_geometry(fmt):
+    """Get (cylinders, heads, sectors_per_track, bytes_per_sector) for a gw format string"""
+    return format_geometry.get(fmt)
+
+def parse_track_spec(spec):
+    """Parse a gw --tracks spec (e.g. 'c=0-79:h=0-1' or '0-5') into (cylinders, heads) lists"""
+    cyls, heads = None, None
+    for part in spec.split(":"):
+        key, _, value = part.rpartition("=")
+        numbers = []
+        for item in value.split(","):
+            low, _, high = item.partition("-")
+            try:
+                numbers.extend(range(int(low), int(high or low) + 1))
+            except ValueError:
+                continue
+        if key in ("", "c"):
+            cyls = numbers
+        elif key == "h":
+            heads = numbers
+    return cyls, heads
 
 def signal_handler(signum, frame):
     """Handle Ctrl+C interruption"""
@@ -274,7 +1182,7 @@ def get_default_extension(system):
 
 def ensure_directories():
     """Ensure required directories exist"""
-    directories = ["templates"]
+    directories = [TEMPLATE_DIR]
     for directory in directories:
         if not os.path.exists(directory):
             try:
@@ -288,9 +1196,13 @@ def cleanup_temp_files():
     temp_patterns = [
         "temp_verify*",
         "temp_repair*", 
-        "temp_write*"
+        "temp_write*",
+        "temp_probe*",
+        "temp_identity*"
     ]
     
+    # Older versions left temp files in the working directory; the scratch
+    # folder is private to this process and removed on exit instead
     for pattern in temp_patterns:
         for file in glob.glob(pattern):
             try:
@@ -753,55 +1665,52 @@ class SetupWizard:
                 except curses.error:
                     continue
         
-        # Create dynamic scanning display
+        # Rule out ports by their USB metadata, then probe the rest at once
+        results = {}
+        for device, reason in port_skip_reasons(ports).items():
+            if reason:
+                results[device] = f"– {device}: Skipped ({reason})"
+        
+        to_probe = [port.device for port in ports if port.device not in results]
+        for device in to_probe:
+            results[device] = f"… {device}: Testing..." if gw_path else f"✗ {device}: Not tested"
+        if not gw_path:
+            # Skip testing if no executable
+            to_probe = []
+        
         content = [
             "STEP 2: DETECT GREASEWEAZLE HARDWARE",
             "",
-            f"Found {len(ports)} COM ports, testing each one...",
+            f"Found {len(ports)} COM ports, testing {len(to_probe)} in parallel...",
             "",
             "Scanning progress:"
         ]
         
-        # Test each port with real-time feedback
-        for i, port in enumerate(ports):
-            # Update display to show current port being tested
-            current_content = content + [
-                "",
-                f"Testing {port.device}..."
-            ]
-            
-            # Show previous results
-            for j, prev_port in enumerate(ports[:i]):
-                if prev_port.device in found_ports:
-                    current_content.append(f"✓ {prev_port.device}: Greaseweazle detected")
-                else:
-                    current_content.append(f"✗ {prev_port.device}: Not Greaseweazle")
-            
-            self.draw_screen("SCANNING HARDWARE", current_content, "Testing in progress...")
-            
-            # Test the port with timeout
-            try:
-                if not gw_path:
-                    # Skip testing if no executable
-                    continue
-                    
-                result = subprocess.run([gw_path, "info", "--device", port.device],
-                    stdout=subprocess.PIPE, stderr=subprocess.PIPE,
-                    timeout=5, text=True)
+        if to_probe:
+            with concurrent.futures.ThreadPoolExecutor(
+                    max_workers=min(PROBE_MAX_WORKERS, len(to_probe))) as executor:
+                serials = {port.device: port.serial_number for port in ports}
+                futures = {executor.submit(probe_port, device, serials[device], False): device
+                           for device in to_probe}
+                pending = set(futures)
                 
-                # FIXED: Better Greaseweazle detection based on official patterns
-                output_text = (result.stdout + result.stderr).lower()
-                if any(keyword in output_text for keyword in [
-                    "greaseweazle", "f7", "f1", "firmware", "flux"
-                ]) or result.returncode == 0:
-                    found_ports.append(port.device)
-                    
-            except subprocess.TimeoutExpired:
-                # Timeout - not a Greaseweazle
-                pass
-            except Exception:
-                # Any other error - not a Greaseweazle
-                pass
+                while pending:
+                    self.draw_screen("SCANNING HARDWARE",
+                                     content + [""] + [results[port.device] for port in ports],
+                                     "Testing in progress...")
+                    done, pending = concurrent.futures.wait(
+                        pending, timeout=0.2, return_when=concurrent.futures.FIRST_COMPLETED)
+                    for future in done:
+                        device = futures[future]
+                        if future.result():
+                            found_ports.append(device)
+                            results[device] = f"✓ {device}: Greaseweazle detected"
+                        else:
+                            results[device] = f"✗ {device}: Not Greaseweazle"
+            save_device_cache()
+        
+        # Keep the port order stable regardless of which probe answered first
+        found_ports.sort(key=[port.device for port in ports].index)
         
         # Show final results
         final_content = [
@@ -813,10 +1722,7 @@ class SetupWizard:
         
         # Show all test results
         for port in ports:
-            if port.device in found_ports:
-                final_content.append(f"✓ {port.device}: Greaseweazle detected")
-            else:
-                final_content.append(f"✗ {port.device}: Not Greaseweazle")
+            final_content.append(results[port.device])
         
         final_content.extend(["", f"Found {len(found_ports)} Greaseweazle device(s)"])
         
@@ -835,7 +1741,7 @@ class SetupWizard:
             ]
             
             for port in ports:
-                content.append(f"  • {port.device} - Not Greaseweazle")
+                content.append(f"  {results[port.device]}")
             
             content.extend([
                 "",
@@ -876,7 +1782,7 @@ class SetupWizard:
             
             # Test the device more thoroughly
             try:
-                result = subprocess.run([gw_path, "info", "--device", com_port],
+                result = subprocess.run([gw_path, "info", "--device", active_port()],
                     stdout=subprocess.PIPE, stderr=subprocess.PIPE,
                     timeout=10, text=True)
                 
@@ -1306,7 +2212,12 @@ class GreaseweazleGUI:
         
         # Operation state
         self.operation_in_progress = False
+        self.operation_start_time = None
+        self.last_exit_code = None
         self.waiting_for_input = False
+        self.progress = None
+        self.heatmap_key = None  # (tracker, window, layout) the drawn heat-map belongs to
+        self.heatmap_cells = {}  # (cyl, head) -> status currently drawn on screen
         
         # FIXED: Get actual screen dimensions safely
         self.init_screen_dimensions()
@@ -1473,7 +2384,9 @@ class GreaseweazleGUI:
             ("file_formats", "File Formats"),
             ("template_files", "Template Files"),
             ("no_verify_mode", "--no-verify Mode"),
-            ("format_strings", "Format Strings")
+            ("format_strings", "Format Strings"),
+            ("job_queue", "Job Queue"),
+            ("catalogue", "Catalogue")
         ]
 
 # Part 5 of 7: GUI Drawing Methods with Fixed Display
@@ -1498,7 +2411,7 @@ class GreaseweazleGUI:
             # Line 1: Title and connection
             title = "Hollik's Greaseweazle Helper v1.0"
             status = f"COM: {com_port or 'None'}"
-            if com_port:
+            if device_connected():
                 status += " ✓"
             else:
                 status += " ✗"
@@ -1675,15 +2588,27 @@ class GreaseweazleGUI:
             return
             
         try:
-            self.output_win.clear()
-            self.output_win.bkgd(' ', self.get_color_pair(COLOR_OUTPUT_NORMAL))
-            
             # Get window dimensions safely
             try:
                 win_height, win_width = self.output_win.getmaxyx()
             except curses.error:
                 return
             
+            # While a heat-map is up only the rows around it are wiped, so the
+            # cells already on screen survive and just the changed ones get redrawn
+            layout = self.heatmap_layout(win_height, win_width)
+            key = (id(self.progress), id(self.output_win), layout) if layout else None
+            if key and key == self.heatmap_key:
+                top, bottom = layout[0], layout[1]
+                for y in list(range(top)) + list(range(bottom, win_height)):
+                    self.output_win.move(y, 0)
+                    self.output_win.clrtoeol()
+            else:
+                self.output_win.clear()
+                self.heatmap_key = key
+                self.heatmap_cells = {}
+            self.output_win.bkgd(' ', self.get_color_pair(COLOR_OUTPUT_NORMAL))
+            
             # FIXED: Draw clean border with error handling
             try:
                 self.output_win.box()
@@ -1997,13 +2922,15 @@ class GreaseweazleGUI:
             except curses.error:
                 pass
         
-        # Show output lines with scrolling
-        visible_lines = win_height - 4
+        # Show output lines with scrolling, above the heat-map when there is one
+        layout = self.heatmap_layout(win_height, win_width)
+        text_bottom = layout[0] if layout else win_height - 2
+        visible_lines = text_bottom - 2
         start_line = max(0, len(self.output_lines) - visible_lines)
         y = 2
         
         for i in range(start_line, len(self.output_lines)):
-            if y < win_height - 2:
+            if y < text_bottom:
                 line = self.output_lines[i]
                 color = COLOR_OUTPUT_NORMAL
                 attr = 0
@@ -2025,6 +2952,86 @@ class GreaseweazleGUI:
                 except curses.error:
                     pass
                 y += 1
+        
+        # Live progress bar on the last line inside the border
+        if self.progress and (self.operation_in_progress or self.progress.done()):
+            bad_tracks = self.progress.count("missing") + self.progress.count("unreadable")
+            if bad_tracks:
+                color = COLOR_WARNING
+            elif self.progress.done() >= self.progress.total_tracks:
+                color = COLOR_OUTPUT_SUCCESS
+            else:
+                color = COLOR_STATUS_BAR
+            try:
+                self.output_win.addstr(win_height - 2, 2, self.progress.status_line(win_width - 4),
+                                     self.get_color_pair(color))
+            except curses.error:
+                pass
+        
+        if layout:
+            self.draw_heatmap(layout)
+    
+    def heatmap_layout(self, win_height, win_width):
+        """Rows and wrapping of the track heat-map, or None when it is not shown
+        
+        Returns (top, bottom, cylinders, heads, per_row): the map occupies rows
+        top..bottom-1 (a blank row, the grid, then the legend).
+        """
+        if self.navigation_state != NAV_OPERATION or not self.progress:
+            return None
+        if not (self.operation_in_progress or self.progress.done()):
+            return None
+        cylinders, heads = self.progress.grid()
+        
+        label_width = 8
+        room = win_width - 4 - label_width
+        if room < 10:
+            return None
+        segments = -(-cylinders // room)
+        per_row = -(-cylinders // segments)
+        bottom = win_height - 2
+        top = bottom - (segments * heads + 2)
+        if top - 2 < HEATMAP_MIN_OUTPUT_LINES:
+            return None
+        return top, bottom, cylinders, heads, per_row
+    
+    def draw_heatmap(self, layout):
+        """Draw the cylinder x head heat-map, touching only cells whose status changed"""
+        top, bottom, cylinders, heads, per_row = layout
+        tracks = self.progress.tracks
+        first_draw = not self.heatmap_cells
+        
+        if first_draw:
+            x = 2
+            for status in ("ok", "retried", "missing", "unreadable", None):
+                char, color = HEATMAP_CELLS[status]
+                text = f"{char} {status or 'pending'}  "
+                try:
+                    self.output_win.addstr(bottom - 1, x, text, self.get_color_pair(color))
+                except curses.error:
+                    pass
+                x += len(text)
+        
+        for start in range(0, cylinders, per_row):
+            for head in range(heads):
+                y = top + 1 + (start // per_row) * heads + head
+                if first_draw:
+                    try:
+                        self.output_win.addstr(y, 2, f"c{start:<3}h{head} ",
+                                             self.get_color_pair(COLOR_OUTPUT_NORMAL))
+                    except curses.error:
+                        pass
+                for cyl in range(start, min(start + per_row, cylinders)):
+                    status = tracks.get((cyl, head))
+                    if not first_draw and self.heatmap_cells.get((cyl, head)) == status:
+                        continue
+                    self.heatmap_cells[(cyl, head)] = status
+                    char, color = HEATMAP_CELLS.get(status, HEATMAP_CELLS[None])
+                    attr = curses.A_BOLD if status else 0
+                    try:
+                        self.output_win.addstr(y, 10 + cyl - start, char, self.get_color_pair(color) | attr)
+                    except curses.error:
+                        pass
     
     def draw_context_help(self):
         """FIXED: Draw context-sensitive help for main menu"""
@@ -2116,6 +3123,8 @@ class GreaseweazleGUI:
             # Show current operation
             if current_operation and win_height > 1:
                 op_text = f"Operation: {current_operation}"
+                if self.operation_start_time:
+                    op_text += f" ({int(time.time() - self.operation_start_time)}s)"
                 if len(op_text) < win_width - 4:
                     try:
                         self.bottom_win.addstr(1, 2, op_text, 
@@ -2151,14 +3160,41 @@ class GreaseweazleGUI:
         if len(self.output_lines) > 1000:
             self.output_lines = self.output_lines[-1000:]
     
+    def set_output_lines(self, lines):
+        """Replace the output panel content (used by live multi-line views)"""
+        self.output_lines = list(lines)
+    
     def clear_output(self):
         """Clear output and switch to operation mode"""
         self.output_lines = []
+        self.progress = None
         self.navigation_state = NAV_OPERATION
         self.active_panel = "right"
         self.waiting_for_input = False
         self.operation_in_progress = False
     
+    def poll_cancel_key(self):
+        """Non-blocking key check during operations, True if ESC was pressed"""
+        cancel = False
+        try:
+            self.stdscr.nodelay(True)
+            while True:
+                key = self.stdscr.getch()
+                if key == -1:
+                    break
+                if key == 27:  # ESC
+                    cancel = True
+                elif key == curses.KEY_RESIZE:
+                    self.handle_resize()
+        except curses.error:
+            pass
+        finally:
+            try:
+                self.stdscr.nodelay(False)
+            except curses.error:
+                pass
+        return cancel
+    
     def wait_for_continue(self):
         """Set waiting state"""
         self.waiting_for_input = True
@@ -2246,9 +3282,21 @@ class GreaseweazleGUI:
             "7": [
                 "REPAIR DISK",
                 "Complete recovery sequence",
-                "Clean → Format → Verify",
+                "Write → Read back per chunk",
                 "⚠ Destroys existing data"
             ],
+            "Q": [
+                "JOB QUEUE",
+                "Batch backup, write and verify",
+                f"{len(get_job_queue().pending())} job(s) pending",
+                "Resumes after a crash or restart"
+            ],
+            "C": [
+                "CATALOGUE",
+                "Every backup, write, verify",
+                "Search by label or hash",
+                f"Stored in {catalogue_file}"
+            ],
             "H": [
                 "HELP TOPICS",
                 "Detailed documentation",
@@ -2306,63 +3354,355 @@ class GreaseweazleGUI:
                 "",
                 f"Current system: {target_system}",
                 ""
-            ] + [f"• {size}: {fmt}" for size, (fmt, _, _) in get_available_formats().items()][:8]
+            ] + [f"• {size}: {fmt}" for size, (fmt, _, _) in get_available_formats().items()][:8],
+            "job_queue": [
+                "### JOB QUEUE",
+                "",
+                "Queue many operations and run them in one go.",
+                "",
+                "• Add Batch Backup: numbered images name_001, name_002...",
+                "• Add Batch Write: several images or copies",
+                "• Add Batch Verify: check a stack of disks",
+                "• Run Queue: prompts only to swap disks",
+                "",
+                "The queue is saved to gw_queue.json after every job.",
+                "After a crash or restart, Run Queue continues with",
+                "the first unfinished job.",
+                "",
+                "⚠ ESC during a job pauses the queue and keeps the job"
+            ],
+            "catalogue": [
+                "### CATALOGUE",
+                "",
+                f"Every backup, write and verify is recorded in {catalogue_file}",
+                "with its hashes, volume label, format and result.",
+                "",
+                "• Search: start of a volume label or file name,",
+                "  or a CRC32/MD5/SHA-1/SHA-256 hex digest",
+                "• Look Up File: hash an image and find where else",
+                "  the same contents were backed up or written",
+                "",
+                "From the command line:",
+                "  GreasyHelper.py --query WORKBENCH",
+                "  GreasyHelper.py --hash image.adf"
+            ]
         }
         return content.get(topic_id, ["No help available for this topic."])
 
-# FIXED: Core operation functions with --no-verify support
-def run_greaseweazle_command(gui, title, args, timeout=300):
-    """FIXED: Execute Greaseweazle command with --no-verify and progress monitoring"""
-    global operation_cancelled, current_operation
+# gw output parser: per-track lines become structured progress events
+TRACK_LINE_PATTERN = re.compile(r"^\s*(?:[A-Z][a-z]+\s+)?(?:T|Track\s+)(\d+)\.(\d+)\b(.*)$")
+SECTORS_PATTERN = re.compile(r"\((\d+)/(\d+) sectors\)")
+RETRY_PATTERN = re.compile(r"Retry #(\d+)(?:\.(\d+))?")
+MISSING_PATTERN = re.compile(r"(\d+) sectors? missing")
+THROUGHPUT_WINDOW = 10  # Recent tracks used for the live tracks/sec figure
+
+def parse_gw_line(line):
+    """Parse one gw output line into a track event dict, or None for other lines"""
+    match = TRACK_LINE_PATTERN.match(line)
+    if not match:
+        return None
     
-    operation_cancelled = False
-    current_operation = title
-    gui.operation_in_progress = True
+    cyl, head, rest = int(match.group(1)), int(match.group(2)), match.group(3)
+    event = {"cyl": cyl, "head": head, "found": None, "total": None,
+             "retry": 0, "gave_up": "Giving up" in rest}
     
-    gui.add_output_line(f"EXECUTING: {title}")
+    sectors = SECTORS_PATTERN.search(rest)
+    if sectors:
+        event["found"], event["total"] = int(sectors.group(1)), int(sectors.group(2))
+    
+    retry = RETRY_PATTERN.search(rest)
+    if retry:
+        event["retry"] = int(retry.group(2) or retry.group(1))
+    
+    missing = MISSING_PATTERN.search(rest)
+    if missing and event["found"] is None:
+        event["missing"] = int(missing.group(1))
+    return event
+
+def expected_track_count(args):
+    """Work out how many tracks a gw command will touch from its arguments"""
+    if "--tracks" in args:
+        index = args.index("--tracks")
+        if index + 1 < len(args):
+            cyls, heads = parse_track_spec(args[index + 1])
+            if cyls:
+                return len(cyls) * len(heads or [0, 1])
+    if "--format" in args:
+        index = args.index("--format")
+        geometry = get_format_geometry(args[index + 1]) if index + 1 < len(args) else None
+        if geometry:
+            return geometry[0] * geometry[1]
+    return default_track_count
+
+def expected_track_grid(args):
+    """Work out the (cylinders, heads) grid a gw command's tracks sit in"""
+    cylinders, heads = None, None
+    if "--format" in args:
+        index = args.index("--format")
+        geometry = get_format_geometry(args[index + 1]) if index + 1 < len(args) else None
+        if geometry:
+            cylinders, heads = geometry[0], geometry[1]
+    if "--tracks" in args:
+        index = args.index("--tracks")
+        if index + 1 < len(args):
+            cyls, track_heads = parse_track_spec(args[index + 1])
+            if cyls:
+                cylinders = max(cylinders or 0, max(cyls) + 1)
+            if track_heads:
+                heads = max(heads or 0, max(track_heads) + 1)
+    if not cylinders:
+        return None
+    return cylinders, heads or 2
+
+class ProgressTracker:
+    """Per-track status, progress, throughput and ETA built from gw track events"""
+    
+    def __init__(self, total_tracks, grid=None):
+        self.total_tracks = max(1, total_tracks)
+        self.cylinders, self.heads = grid or (-(-self.total_tracks // 2), 2)
+        self.tracks = {}  # (cyl, head) -> status: ok, retried, missing, unreadable
+        self.sectors = {}  # (cyl, head) -> (found, total)
+        self.retries = 0
+        self.start_time = time.time()
+        self.completion_times = []
+    
+    def update(self, event):
+        """Apply one parsed track event, returning the track's new status"""
+        key = (event["cyl"], event["head"])
+        first_sight = key not in self.tracks
+        if event["retry"]:
+            self.retries += 1
+        
+        found, total = event["found"], event["total"]
+        if found is not None and total:
+            self.sectors[key] = (found, total)
+            if found == total:
+                status = "retried" if event["retry"] or self.tracks.get(key) in ("missing", "retried") else "ok"
+            elif found == 0:
+                status = "unreadable"
+            else:
+                status = "missing"
+        elif event["gave_up"] or event.get("missing"):
+            status = "unreadable" if self.tracks.get(key) in (None, "unreadable") else "missing"
+        else:
+            status = self.tracks.get(key, "ok")
+        
+        self.tracks[key] = status
+        if first_sight:
+            self.completion_times.append(time.time())
+        return status
+    
+    def grid(self):
+        """(cylinders, heads) covering the expected tracks and every track seen"""
+        cylinders, heads = self.cylinders, self.heads
+        for cyl, head in self.tracks:
+            cylinders = max(cylinders, cyl + 1)
+            heads = max(heads, head + 1)
+        return cylinders, heads
+    
+    def done(self):
+        """Number of distinct tracks processed so far"""
+        return len(self.tracks)
+    
+    def fraction(self):
+        """Completed fraction between 0.0 and 1.0"""
+        return min(1.0, self.done() / self.total_tracks)
+    
+    def overall_rate(self):
+        """Average tracks per second since the command started"""
+        elapsed = time.time() - self.start_time
+        return self.done() / elapsed if elapsed > 0 else 0.0
+    
+    def recent_rate(self):
+        """Tracks per second over the last THROUGHPUT_WINDOW tracks"""
+        times = self.completion_times[-(THROUGHPUT_WINDOW + 1):]
+        if len(times) < 2 or times[-1] <= times[0]:
+            return self.overall_rate()
+        return (len(times) - 1) / (times[-1] - times[0])
+    
+    def eta(self):
+        """Estimated seconds remaining, or None before the first track"""
+        rate = self.recent_rate()
+        if not self.done() or rate <= 0:
+            return None
+        return max(0, self.total_tracks - self.done()) / rate
+    
+    def count(self, status):
+        """Number of tracks currently in the given status"""
+        return sum(1 for value in self.tracks.values() if value == status)
+    
+    def failed_tracks(self):
+        """Sorted (cyl, head) list of tracks that still have missing sectors"""
+        return sorted(key for key, value in self.tracks.items() if value in ("missing", "unreadable"))
+    
+    def is_slowing(self):
+        """True when recent throughput has dropped well below the average"""
+        return self.done() > THROUGHPUT_WINDOW and self.recent_rate() < 0.7 * self.overall_rate()
+    
+    def status_line(self, width):
+        """Single-line progress bar with throughput and ETA, fitted to width"""
+        eta = self.eta()
+        eta_text = f"{int(eta) // 60}:{int(eta) % 60:02d}" if eta is not None else "--:--"
+        info = (f" {int(self.fraction() * 100):3d}% {self.done()}/{self.total_tracks} "
+                f"{self.recent_rate():.1f} tr/s ETA {eta_text}")
+        bad = self.count("missing") + self.count("unreadable")
+        if bad:
+            info += f" ✗{bad}"
+        if self.is_slowing():
+            info += " ▼slow"
+        bar_width = max(0, width - len(info) - 2)
+        filled = int(bar_width * self.fraction())
+        return "[" + "█" * filled + "░" * (bar_width - filled) + "]" + info
+    
+    def summary(self):
+        """Final summary line for the output panel"""
+        return (f"Tracks: {self.done()} read, {self.count('retried')} retried, "
+                f"{self.count('missing')} with missing sectors, {self.count('unreadable')} unreadable, "
+                f"{self.overall_rate():.1f} tr/s")
+
+# Command execution engine: gw output is read on a background thread and
+# handed to the UI through a queue, so the curses loop never blocks on it
+COMMAND_POLL_INTERVAL = 0.1  # Seconds between key polls while a command runs
+COMMAND_STOP_GRACE = 5  # Seconds to wait after terminate() before kill()
+
+class GreaseweazleProcess:
+    """Greaseweazle subprocess with non-blocking, line-based output streaming"""
+    
+    def __init__(self, args):
+        self.args = args
+        self.proc = None
+        self.reader = None
+        self.lines = queue.Queue()
+        self.output_closed = False
+        self.start_time = None
+    
+    def start(self):
+        """Launch the process and its output reader thread"""
+        self.proc = subprocess.Popen(self.args, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                                     text=True, bufsize=1, errors="replace")
+        self.start_time = time.time()
+        self.reader = threading.Thread(target=self._read_output, daemon=True)
+        self.reader.start()
+    
+    def _read_output(self):
+        """Reader thread: push each output line onto the queue, then None at EOF"""
+        try:
+            for line in self.proc.stdout:
+                self.lines.put(line.rstrip())
+        except (OSError, ValueError):
+            pass
+        finally:
+            self.lines.put(None)
+    
+    def get_lines(self, wait=0):
+        """Return all queued output lines, waiting up to `wait` seconds for the first"""
+        lines = []
+        try:
+            item = self.lines.get(timeout=wait) if wait > 0 else self.lines.get_nowait()
+            while True:
+                if item is None:
+                    self.output_closed = True
+                else:
+                    lines.append(item)
+                item = self.lines.get_nowait()
+        except queue.Empty:
+            pass
+        return lines
+    
+    def elapsed(self):
+        """Seconds since the process was started"""
+        return time.time() - self.start_time if self.start_time else 0
+    
+    def is_finished(self):
+        """True once the process has exited and all output has been drained"""
+        return self.output_closed and self.proc.poll() is not None
+    
+    def stop(self):
+        """Terminate the process, escalating to kill if it does not exit"""
+        if self.proc.poll() is not None:
+            return
+        self.proc.terminate()
+        try:
+            self.proc.wait(timeout=COMMAND_STOP_GRACE)
+        except subprocess.TimeoutExpired:
+            self.proc.kill()
+            try:
+                self.proc.wait(timeout=COMMAND_STOP_GRACE)
+            except subprocess.TimeoutExpired:
+                pass
+
+# FIXED: Core operation functions with --no-verify support
+def run_greaseweazle_command(gui, title, args, timeout=300, on_poll=None):
+    """FIXED: Execute Greaseweazle command with --no-verify and progress monitoring
+    
+    on_poll, if given, is called once per poll interval while gw runs.
+    """
+    global operation_cancelled, current_operation
+    
+    # Device workers run this on their own threads: the global cancel flag,
+    # current operation and SIGINT handler belong to the interactive UI only
+    in_main_thread = threading.current_thread() is threading.main_thread()
+    if in_main_thread:
+        operation_cancelled = False
+        current_operation = title
+    cancelled = False
+    gui.operation_in_progress = True
+    gui.last_exit_code = None
+    
+    gui.add_output_line(f"EXECUTING: {title}")
     gui.add_output_line("=" * (len(title) + 11))
     gui.add_output_line(f"Command: {' '.join(args)}")
     gui.add_output_line("Press ESC to cancel")
     gui.refresh_all()
     
+    process = GreaseweazleProcess(args)
+    tracker = ProgressTracker(expected_track_count(args), expected_track_grid(args))
+    gui.progress = tracker
     try:
-        signal.signal(signal.SIGINT, signal_handler)
-        proc = subprocess.Popen(args, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, 
-                              text=True, bufsize=1)
-        
-        start_time = time.time()
+        if in_main_thread:
+            signal.signal(signal.SIGINT, signal_handler)
+        process.start()
+        gui.operation_start_time = process.start_time
         
+        # Keys, timeout and output are all polled at a fixed rate, so ESC and
+        # the timeout work even while gw is silent (seek, spin-up, flux capture)
         while True:
-            if operation_cancelled:
-                proc.terminate()
-                try:
-                    proc.wait(timeout=5)
-                except subprocess.TimeoutExpired:
-                    proc.kill()
+            if gui.poll_cancel_key() or (in_main_thread and operation_cancelled):
+                cancelled = True
+                if in_main_thread:
+                    operation_cancelled = True
+            
+            if cancelled:
+                process.stop()
                 gui.add_output_line("✗ Operation cancelled")
                 log_operation(title, "CANCELLED", "User cancelled")
                 return False
             
-            if time.time() - start_time > timeout:
-                proc.terminate()
+            if process.elapsed() > timeout:
+                process.stop()
                 gui.add_output_line(f"✗ Timeout after {timeout}s")
                 log_operation(title, "TIMEOUT", f"Exceeded {timeout}s")
                 return False
             
-            try:
-                line = proc.stdout.readline()
-                if not line:
-                    break
-                line = line.rstrip()
+            for line in process.get_lines(wait=COMMAND_POLL_INTERVAL):
                 if line:
                     gui.add_output_line(line)
-                    gui.refresh_all()
-            except:
+                    event = parse_gw_line(line)
+                    if event:
+                        tracker.update(event)
+            if on_poll:
+                on_poll()
+            gui.refresh_all()
+            
+            if process.is_finished():
                 break
         
-        proc.wait()
+        proc = process.proc
+        gui.last_exit_code = proc.returncode
+        if tracker.done():
+            gui.add_output_line(tracker.summary())
         
-        if not operation_cancelled and proc.returncode == 0:
+        if proc.returncode == 0:
             gui.add_output_line(f"✓ {title} completed successfully")
             log_operation(title, "SUCCESS", "")
             return True
@@ -2372,13 +3712,17 @@ def run_greaseweazle_command(gui, title, args, timeout=300):
             return False
             
     except Exception as e:
+        if process.proc:
+            process.stop()
         gui.add_output_line(f"✗ Error: {e}")
         log_operation(title, "ERROR", str(e))
         return False
     finally:
-        current_operation = None
         gui.operation_in_progress = False
-        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        gui.operation_start_time = None
+        if in_main_thread:
+            current_operation = None
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
 
 def open_file_browser_safe(title, filetypes, mode="open"):
     """FIXED: Safe file browser with proper curses handling"""
@@ -2393,6 +3737,8 @@ def open_file_browser_safe(title, filetypes, mode="open"):
         
         if mode == "open":
             result = filedialog.askopenfilename(title=title, filetypes=filetypes, parent=root)
+        elif mode == "multiple":
+            result = list(filedialog.askopenfilenames(title=title, filetypes=filetypes, parent=root))
         else:
             result = filedialog.asksaveasfilename(title=title, filetypes=filetypes, parent=root)
         
@@ -2411,13 +3757,57 @@ def open_file_browser_safe(title, filetypes, mode="open"):
 # Hollik's Greaseweazle Helper v1.0
 # FIXED: All operations with --no-verify support
 
+def confirm_operation(gui, prompt):
+    """Show a prompt and wait for ENTER (True) or ESC (False)"""
+    gui.add_output_line(prompt)
+    gui.refresh_all()
+    
+    while True:
+        try:
+            key = gui.stdscr.getch()
+            if key == 27:  # ESC
+                return False
+            elif key == 10 or key == 13:  # ENTER
+                return True
+        except curses.error:
+            continue
+
+def perform_format_disk(gui, format_name, system=None):
+    """Write the template for format_name to disk, returns True on success"""
+    system = system or target_system
+    formats = format_profiles.get(system, {})
+    if format_name not in formats:
+        gui.add_output_line(f"✗ Unknown format {format_name} for {system}")
+        return False
+    
+    template_path = get_template_path(format_name, system)
+    if not template_path:
+        gui.add_output_line(f"✗ Template not found for {format_name}")
+        gui.add_output_line("Use 'Check Templates' to verify files")
+        return False
+    
+    fmt, filename, size = formats[format_name]
+    if not fmt:
+        gui.add_output_line(f"✗ No format string for {format_name}")
+        return False
+    
+    # FIXED: Write with format string and --no-verify
+    args = [gw_path, "write", template_path, "--device", active_port(), 
+            "--format", fmt, "--no-verify"] + drive_arg()
+    
+    result = run_greaseweazle_command(gui, f"Format {format_name}", args)
+    
+    if result:
+        gui.add_output_line("✓ Format completed successfully")
+        gui.add_output_line("Disk is ready for use")
+    return result
+
 def execute_format_disk(gui, format_name):
     """FIXED: Execute disk formatting with --no-verify"""
     gui.clear_output()
     gui.add_output_line("FORMAT DISK OPERATION")
     
-    template_path = get_template_path(format_name)
-    if not template_path:
+    if not template_available(format_name):
         gui.add_output_line(f"✗ Template not found for {format_name}")
         gui.add_output_line("Use 'Check Templates' to verify files")
         gui.wait_for_continue()
@@ -2430,37 +3820,461 @@ def execute_format_disk(gui, format_name):
     gui.add_output_line(f"Template: {filename} ({size:,} bytes)")
     gui.add_output_line(f"Format string: {fmt}")
     gui.add_output_line("⚠ Using --no-verify for compatibility")
-    gui.add_output_line("Press ENTER to proceed, ESC to cancel")
-    gui.refresh_all()
     
-    while True:
+    if not confirm_operation(gui, "Press ENTER to proceed, ESC to cancel"):
+        gui.add_output_line("Operation cancelled")
+        gui.wait_for_continue()
+        return
+    
+    perform_format_disk(gui, format_name)
+    gui.wait_for_continue()
+
+# Disk image containers: compressed or wrapped images are decoded to a raw
+# image in the template cache folder before detection and writing. Decoded
+# files are named by the container's content hash, so the same image is
+# only decoded once.
+CONTAINER_MAX_TRAILER = 1024  # Filler bytes tolerated after a raw image
+
+content_hashes = {}  # (path, size, mtime_ns) -> SHA-1 of the file
+
+def known_image_sizes():
+    """Every image size used by a format profile"""
+    return {size for formats in format_profiles.values() for fmt, filename, size in formats.values()}
+
+def trailing_filler_size(f, size):
+    """Raw image size if the file is a known image plus uniform filler bytes, else None"""
+    for image_size in sorted(known_image_sizes(), reverse=True):
+        extra = size - image_size
+        if 0 < extra <= CONTAINER_MAX_TRAILER:
+            f.seek(image_size)
+            tail = f.read(extra)
+            if tail == tail[:1] * extra:
+                return image_size
+    return None
+
+def identify_container(path):
+    """Recognise a wrapped image, returns (kind, payload_offset, payload_size, extension) or None"""
+    size = os.path.getsize(path)
+    with open(path, "rb") as f:
+        header = f.read(96)
+        
+        if header[:2] == b"\x1f\x8b":
+            inner = os.path.splitext(os.path.basename(path))[0]
+            if path.lower().endswith(".adz"):
+                inner += ".adf"
+            return ("gzip", 0, None, os.path.splitext(inner)[1] or ".img")
+        
+        if header[:6] == b"\xfd7zXZ\x00":
+            inner = os.path.splitext(os.path.basename(path))[0]
+            return ("xz", 0, None, os.path.splitext(inner)[1] or ".img")
+        
+        if header[:4] == b"2IMG" and len(header) >= 0x20:
+            offset, length = struct.unpack_from("<II", header, 0x18)
+            if offset + length <= size:
+                return ("2MG", offset, length, ".po" if header[0x0C] == 1 else ".dsk")
+        
+        if header[:2] == b"\x0e\x0f" and len(header) >= 10:
+            return ("MSA", 2, None, ".st")
+        
+        if header[:2] == b"\x42\x42" and header[3] == 0 and size - 32 in known_image_sizes():
+            return ("DIM", 32, size - 32, ".st")
+        
+        if len(header) >= 84 and header[0] < 64 and header[0x52:0x54] == b"\x01\x00":
+            data_size, tag_size = struct.unpack_from(">II", header, 0x40)
+            if 84 + data_size + tag_size == size:
+                return ("DiskCopy 4.2", 84, data_size, ".img")
+        
+        image_size = trailing_filler_size(f, size)
+        if image_size:
+            return ("trailing filler", 0, image_size, os.path.splitext(path)[1])
+    return None
+
+def copy_range(source, target, length, block_size=1024 * 1024, on_block=None):
+    """Stream length bytes (or everything if None) from one file object to another"""
+    while length is None or length > 0:
+        block = source.read(block_size if length is None else min(block_size, length))
+        if not block:
+            break
+        target.write(block)
+        if on_block:
+            on_block(block)
+        if length is not None:
+            length -= len(block)
+
+def decode_msa(source, target):
+    """Expand an Atari MSA archive track by track"""
+    spt, sides, start, end = struct.unpack(">4H", source.read(8))
+    track_size = spt * 512
+    for track in range((end - start + 1) * (sides + 1)):
+        length = struct.unpack(">H", source.read(2))[0]
+        data = source.read(length)
+        if length == track_size:
+            target.write(data)
+            continue
+        
+        # Run length encoded: E5 <byte> <count word>
+        output = bytearray()
+        i = 0
+        while i < len(data):
+            if data[i] == 0xE5:
+                if i + 4 > len(data):
+                    raise ValueError(f"truncated run in track {track}")
+                output += bytes([data[i + 1]]) * struct.unpack_from(">H", data, i + 2)[0]
+                i += 4
+            else:
+                output.append(data[i])
+                i += 1
+        target.write(bytes(output[:track_size]).ljust(track_size, b"\x00"))
+
+def content_hash(path):
+    """SHA-1 of a file's contents, memoised by path, size and mtime"""
+    stat = os.stat(path)
+    key = (path, stat.st_size, stat.st_mtime_ns)
+    if key not in content_hashes:
+        digest = hashlib.sha1()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(block)
+        content_hashes[key] = digest.hexdigest()
+    return content_hashes[key]
+
+def decode_image(path, gui=None):
+    """Raw image path for a possibly wrapped image, decoding into the cache once"""
+    try:
+        container = identify_container(path)
+    except OSError:
+        return path
+    if not container:
+        return path
+    
+    kind, offset, length, extension = container
+    cache_dir = template_cache_dir()
+    target = os.path.join(cache_dir, f"decoded_{content_hash(path)[:16]}{extension}")
+    
+    if not use_cached_template(target):
+        os.makedirs(cache_dir, exist_ok=True)
+        temp_target = f"{target}.{os.getpid()}.tmp"
         try:
-            key = gui.stdscr.getch()
-            if key == 27:  # ESC
-                gui.add_output_line("Operation cancelled")
-                gui.wait_for_continue()
-                return
-            elif key == 10 or key == 13:  # ENTER
-                break
-        except curses.error:
+            with open(temp_target, "wb") as out:
+                if kind in ("gzip", "xz"):
+                    with (gzip.open if kind == "gzip" else lzma.open)(path, "rb") as source:
+                        copy_range(source, out, None)
+                else:
+                    with open(path, "rb") as source:
+                        source.seek(offset)
+                        if kind == "MSA":
+                            decode_msa(source, out)
+                        else:
+                            copy_range(source, out, length)
+        except (EOFError, struct.error, zlib.error, lzma.LZMAError) as error:
+            # Damaged data surfaces as one error type for every caller
+            remove_files(temp_target)
+            raise ValueError(f"corrupt {kind} image: {error}") from error
+        except Exception:
+            remove_files(temp_target)
+            raise
+        store_cached_template(temp_target, target)
+    
+    if gui:
+        gui.add_output_line(f"Unpacked {kind} image ({os.path.getsize(target):,} bytes)")
+    
+    # A gzip or xz may hold another container (e.g. a compressed DiskCopy image)
+    return decode_image(target, gui) if kind in ("gzip", "xz") else target
+
+# Image format detection: inspect the filesystem structures in the first
+# sectors (memory-mapped, so only the pages looked at are read) and score
+# every gw format the image could be
+DETECT_MIN_CONFIDENCE = 0.5  # Below this the result is reported as a guess
+
+def image_formats_by_size(size):
+    """All gw formats whose profile image size is size, with the systems using them"""
+    matches = {}
+    for system, formats in format_profiles.items():
+        for fmt, filename, expected_size in formats.values():
+            if expected_size == size:
+                matches.setdefault(fmt, []).append(system)
+    return matches
+
+def geometry_format(family, total_sectors, spt, heads, bps=512):
+    """gw format in a family whose geometry matches a BPB, or None"""
+    for fmt, (cyls, fmt_heads, fmt_spt, fmt_bps) in format_geometry.items():
+        if (fmt.split(".")[0] == family and fmt_spt == spt and fmt_heads == heads
+                and fmt_bps == bps and cyls * heads * spt == total_sectors):
+            return fmt
+    return None
+
+def sniff_fat_bpb(data, size):
+    """Score FAT12 boot sectors: PC, Atari ST or MSX"""
+    if len(data) < 512:
+        return []
+    bps, spc, reserved, fats, root_entries, total, media, spf, spt, heads = \
+        struct.unpack_from("<HBHBHHBHHH", data, 11)
+    if (bps != 512 or spc not in (1, 2, 4, 8) or fats not in (1, 2) or media < 0xF0
+            or not spt or not heads or total * bps != size):
+        return []
+    
+    results = []
+    jump, oem = data[0], bytes(data[3:11])
+    boot_sum = sum(struct.unpack_from(">256H", data, 0)) & 0xFFFF
+    if boot_sum == 0x1234 or jump == 0x60:
+        family, confidence, reason = "atarist", 0.95 if boot_sum == 0x1234 else 0.9, "Atari ST boot sector"
+    elif oem.startswith(b"MSX") or bytes(data[0:2]) == b"\xeb\xfe":
+        family, confidence, reason = "msx", 0.85, "MSX boot sector"
+    elif jump in (0xEB, 0xE9) and bytes(data[510:512]) == b"\x55\xaa":
+        family, confidence, reason = "ibm", 0.9, "DOS boot sector"
+    else:
+        family, confidence, reason = "atarist", 0.6, "FAT BPB without PC boot signature"
+    
+    fmt = geometry_format(family, total, spt, heads)
+    if fmt:
+        results.append((fmt, confidence, f"{reason}, {spt} sectors x {heads} heads"))
+    # The same geometry is readable as plain IBM MFM
+    if family != "ibm":
+        fmt = geometry_format("ibm", total, spt, heads)
+        if fmt:
+            results.append((fmt, confidence - 0.3, f"{reason}, as IBM MFM"))
+    return results
+
+def sniff_amigados(data, size):
+    """Score AmigaDOS bootblock and rootblock"""
+    if bytes(data[0:3]) != b"DOS" or data[3] > 7:
+        return []
+    fmt = {901120: "amiga.amigados", 1802240: "amiga.amigados_hd"}.get(size)
+    if not fmt:
+        return []
+    root = size // 512 // 2 * 512
+    if struct.unpack_from(">I", data, root)[0] == 2 and struct.unpack_from(">I", data, root + 508)[0] == 1:
+        return [(fmt, 0.99, "AmigaDOS bootblock and rootblock")]
+    return [(fmt, 0.9, "AmigaDOS bootblock")]
+
+def sniff_cbm(data, size):
+    """Score CBM DOS BAM (1541/1571 at 18/0, 1581 at 40/0)"""
+    if size in (174848, 175531, 349696, 351062) and len(data) > 0x16504:
+        bam = data[0x16500:0x16504]
+        if bam[0] == 18 and bam[2] == 0x41:
+            if size in (349696, 351062) and bam[3] == 0x80:
+                return [("commodore.1571", 0.95, "1571 BAM, double sided")]
+            return [("commodore.1541", 0.95, "1541 BAM")]
+    if size == 819200:
+        header = data[0x61800:0x61804]
+        if header[0] == 40 and header[2] == 0x44:
+            return [("commodore.1581", 0.95, "1581 header and BAM")]
+    return []
+
+def sniff_apple(data, size):
+    """Score Macintosh HFS and MFS volumes"""
+    if len(data) < 0x402:
+        return []
+    signature = bytes(data[0x400:0x402])
+    fmt = {409600: "mac.400", 819200: "mac.800", 1474560: "ibm.1440"}.get(size)
+    if signature == b"BD" and fmt:
+        return [(fmt, 0.95, "HFS master directory block")]
+    if signature == b"\xd2\xd7" and fmt:
+        return [(fmt, 0.95, "MFS volume")]
+    return []
+
+def sniff_zx_acorn(data, size):
+    """Score TR-DOS system sector and Acorn ADFS maps"""
+    results = []
+    # System sector (track 0, sector 9): TR-DOS ID 0x10 at 0x8E7, disk type 0x16-0x19 at 0x8E3
+    if size == 655360 and data[0x8E7] == 0x10:
+        confidence = 0.9 if 0x16 <= data[0x8E3] <= 0x19 else 0.7
+        results.append(("zx.trdos.640", confidence, "TR-DOS system sector"))
+    for offset in (0x201, 0x401, 0x801):
+        if bytes(data[offset:offset + 4]) in (b"Hugo", b"Nick"):
+            fmt = {163840: "acorn.adfs.160", 327680: "acorn.adfs.320", 655360: "acorn.adfs.640",
+                   819200: "acorn.adfs.800", 1638400: "acorn.adfs.1600"}.get(size)
+            if fmt:
+                results.append((fmt, 0.85, "ADFS directory"))
+            break
+    return results
+
+image_sniffers = [sniff_amigados, sniff_cbm, sniff_apple, sniff_fat_bpb, sniff_zx_acorn]
+
+def detect_image_format(path, system=None):
+    """Rank the gw formats an image could be, returns [(fmt, confidence, reason)] best first"""
+    system = system or target_system
+    size = os.path.getsize(path)
+    scores = {}
+    
+    if size:
+        with open(path, "rb") as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                for sniffer in image_sniffers:
+                    try:
+                        for fmt, confidence, reason in sniffer(data, size):
+                            if confidence > scores.get(fmt, (0, ""))[0]:
+                                scores[fmt] = (confidence, reason)
+                    except (IndexError, struct.error):
+                        continue  # Image too short for this structure
+    
+    # Size alone is weak evidence, a little stronger for the selected system
+    for fmt, systems in image_formats_by_size(size).items():
+        confidence = 0.4 if system in systems else 0.3
+        if fmt not in scores:
+            scores[fmt] = (confidence, "size match")
+        elif system in systems:
+            scores[fmt] = (min(1.0, scores[fmt][0] + 0.05), scores[fmt][1])
+    
+    return sorted(((fmt, confidence, reason) for fmt, (confidence, reason) in scores.items()),
+                  key=lambda result: -result[1])
+
+def detect_write_format(gui, path, system=None):
+    """Pick the gw format string for an image file from its contents, with per-system defaults"""
+    system = system or target_system
+    filesize = os.path.getsize(path)
+    
+    try:
+        candidates = detect_image_format(path, system)
+    except (OSError, ValueError):
+        candidates = []
+    
+    if candidates:
+        fmt, confidence, reason = candidates[0]
+        label = "Detected" if confidence >= DETECT_MIN_CONFIDENCE else "Best guess"
+        gui.add_output_line(f"{label}: {fmt} ({confidence:.0%}, {reason})")
+        others = [other for other, other_confidence, _ in candidates[1:4] if other_confidence >= 0.3]
+        if others:
+            gui.add_output_line(f"Also possible: {', '.join(others)}")
+        return fmt
+    
+    # System-specific defaults
+    format_defaults = {
+        "PC": "ibm.1440" if filesize > 1000000 else "ibm.720",
+        "Amiga": "amiga.amigados",
+        "Apple": "mac.800" if filesize <= 900000 else "ibm.1440",
+        "Atari": "atarist.720" if filesize > 500000 else "atarist.360",
+        "C64": "commodore.1541",
+        "ZXSpectrum": "zx.trdos.640"
+    }
+    detected_format = format_defaults.get(system, "ibm.720")
+    gui.add_output_line(f"Using default: {detected_format}")
+    return detected_format
+
+# Differential write: read the disk first, compare per-track CRCs with the
+# image and write only the tracks that differ
+def track_checksums(path, fmt, only=None):
+    """{(cyl, head): crc32} for every complete track of an image, or just the tracks in only
+    
+    An image holding fewer bytes than the whole format is taken to contain
+    just the tracks in only, as written by gw read --tracks.
+    """
+    layout = sector_layout(fmt)
+    bps = get_format_geometry(fmt)[3]
+    checksums = {}
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if not size:
+            return checksums
+        if only is not None and size < sum(spt for cyl, head, spt in layout) * bps:
+            layout = [track for track in layout if track[:2] in only]
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            offset = 0
+            for cyl, head, spt in layout:
+                end = offset + spt * bps
+                if end > size:
+                    break
+                if only is None or (cyl, head) in only:
+                    checksums[(cyl, head)] = zlib.crc32(data[offset:end])
+                offset = end
+    return checksums
+
+def track_ranges(tracks):
+    """Group (cyl, head) tracks into gw --tracks specs of consecutive cylinders with the same heads"""
+    heads_by_cyl = collections.defaultdict(set)
+    for cyl, head in tracks:
+        heads_by_cyl[cyl].add(head)
+    
+    specs = []
+    run_start = run_end = run_heads = None
+    for cyl in sorted(heads_by_cyl) + [None]:
+        heads = heads_by_cyl.get(cyl)
+        if run_start is not None and cyl == run_end + 1 and heads == run_heads:
+            run_end = cyl
             continue
+        if run_start is not None:
+            cyls = f"{run_start}-{run_end}" if run_end > run_start else str(run_start)
+            specs.append(f"c={cyls}:h={','.join(map(str, sorted(run_heads)))}")
+        run_start = run_end = cyl
+        run_heads = heads
+    return specs
+
+def differing_tracks(gui, path, fmt, system):
+    """Tracks of the disk that differ from the image, None if the disk could not be compared"""
+    if not sector_layout(fmt):
+        return None
+    temp_file = temp_file_name("temp_write_diff", os.path.splitext(path)[1] or get_default_extension(system))
+    args = [gw_path, "read", temp_file, "--device", active_port(), "--format", fmt] + drive_arg()
+    try:
+        if not run_greaseweazle_command(gui, "Read current disk", args) or not os.path.exists(temp_file):
+            return None
+        # Tracks with missing sectors are rewritten even if the filler happens to match
+        damaged = set(gui.progress.failed_tracks()) if gui.progress else set()
+        wanted, current = track_checksums(path, fmt), track_checksums(temp_file, fmt)
+    except (OSError, ValueError):
+        return None
+    finally:
+        remove_files(temp_file)
+    return sorted(key for key, crc in wanted.items() if current.get(key) != crc or key in damaged)
+
+def perform_write_image(gui, path, gw_format=None, system=None, differential=False):
+    """Write an image file to disk, detecting the format if not given"""
+    if not os.path.exists(path):
+        gui.add_output_line(f"✗ Image not found: {path}")
+        return False
+    
+    filename = os.path.basename(path)
+    source_path = path
+    try:
+        path = decode_image(path, gui)
+    except (OSError, EOFError, ValueError, struct.error) as e:
+        gui.add_output_line(f"✗ Could not unpack {filename}: {e}")
+        return False
+    detected_format = gw_format or detect_write_format(gui, path, system)
     
     # FIXED: Write with format string and --no-verify
-    if fmt:
-        args = [gw_path, "write", template_path, "--device", com_port, 
-                "--format", fmt, "--no-verify"] + drive_arg()
+    if detected_format:
+        args = [gw_path, "write", path, "--device", active_port(), 
+                "--format", detected_format, "--no-verify"] + drive_arg()
     else:
-        gui.add_output_line(f"✗ No format string for {format_name}")
-        gui.wait_for_continue()
-        return
+        gui.add_output_line("✗ Could not determine format")
+        return False
     
-    result = run_greaseweazle_command(gui, f"Format {format_name}", args)
+    started = time.time()
+    tracks = differing_tracks(gui, path, detected_format, system or target_system) if differential else None
+    if differential and tracks is None:
+        gui.add_output_line("⚠ Could not compare with the disk, writing every track")
     
-    if result:
-        gui.add_output_line("✓ Format completed successfully")
-        gui.add_output_line("Disk is ready for use")
+    if tracks is None:
+        result = run_greaseweazle_command(gui, f"Write {filename}", args)
+    else:
+        specs = track_ranges(tracks)
+        total = len(sector_layout(detected_format))
+        gui.add_output_line(f"{len(tracks)} of {total} tracks differ, {len(specs)} write(s) needed")
+        result = True
+        for spec in specs:
+            if not run_greaseweazle_command(gui, f"Write {filename} {spec}", args + ["--tracks", spec]):
+                result = False
+                break
     
-    gui.wait_for_continue()
+    # A differential write that found nothing to change is logged as such
+    operation = "write (unchanged)" if result and tracks == [] else "write"
+    catalogue_record(operation, source_path, file_hashes(path), {
+        "format": detected_format,
+        "system": system or target_system,
+        "label": read_volume_label(path, detected_format),
+        "device": active_port(),
+        "started": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(started)),
+        "duration": round(time.time() - started, 1),
+        "result": "OK" if result else "FAILED"
+    })
+    
+    if result and tracks == []:
+        gui.add_output_line("✓ Disk already matches the image, nothing written")
+    elif result:
+        gui.add_output_line("✓ Image written successfully")
+        gui.add_output_line("Disk is ready for use")
+    return result
 
 def execute_write_image(gui, option):
     """FIXED: Execute write image with --no-verify"""
@@ -2483,270 +4297,2221 @@ def execute_write_image(gui, option):
     filename = os.path.basename(path)
     filesize = os.path.getsize(path)
     
-    # Detect format based on size and system
-    detected_format = None
-    formats = get_available_formats()
-    
-    # Match by exact file size first
-    for format_name, (fmt, template_name, expected_size) in formats.items():
-        if filesize == expected_size:
-            detected_format = fmt
-            gui.add_output_line(f"Detected: {format_name} (format: {fmt})")
-            break
-    
-    # System-specific defaults
-    if not detected_format:
-        format_defaults = {
-            "PC": "ibm.1440" if filesize > 1000000 else "ibm.720",
-            "Amiga": "amiga.amigados",
-            "Apple": "mac.800" if filesize <= 900000 else "ibm.1440",
-            "Atari": "atarist.720" if filesize > 500000 else "atarist.360",
-            "C64": "commodore.1541",
-            "ZXSpectrum": "zx.trdos.640"
-        }
-        detected_format = format_defaults.get(target_system, "ibm.720")
-        gui.add_output_line(f"Using default: {detected_format}")
+    # Detect the format from the decoded image, not its container
+    try:
+        detected_format = detect_write_format(gui, decode_image(path))
+    except (OSError, EOFError, ValueError, struct.error) as e:
+        gui.add_output_line(f"✗ Could not unpack {filename}: {e}")
+        gui.wait_for_continue()
+        return
     
     gui.add_output_line(f"File: {filename}")
     gui.add_output_line(f"Size: {filesize:,} bytes")
     gui.add_output_line("⚠ Using --no-verify for compatibility")
     gui.add_output_line("⚠ This will overwrite disk!")
-    gui.add_output_line("Press ENTER to write, ESC to cancel")
-    gui.refresh_all()
     
-    while True:
-        try:
-            key = gui.stdscr.getch()
-            if key == 27:  # ESC
-                gui.add_output_line("Operation cancelled")
-                gui.wait_for_continue()
-                return
-            elif key == 10 or key == 13:  # ENTER
-                break
-        except curses.error:
-            continue
+    if not confirm_operation(gui, "Press ENTER to write, ESC to cancel"):
+        gui.add_output_line("Operation cancelled")
+        gui.wait_for_continue()
+        return
+    
+    perform_write_image(gui, path, detected_format, differential=option == "DIFFERENTIAL")
+    gui.wait_for_continue()
+
+# Backup manifests: hashes are computed while gw writes the image, by tailing
+# the growing file from the runner's poll loop, so no second read is needed
+class StreamingHasher:
+    """CRC32, MD5, SHA-1 and SHA-256 of a file, fed as the file grows"""
+    
+    def __init__(self, path):
+        self.path = path
+        try:
+            stat = os.stat(path)
+            # An existing file is old content until gw replaces it
+            self.stale = (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+        except OSError:
+            self.stale = None
+        self.identity = None
+        self.reset()
+    
+    def reset(self):
+        """Start hashing from the beginning of the file"""
+        self.position = 0
+        self.read_mtime = None
+        self.crc32 = 0
+        self.digests = [hashlib.md5(), hashlib.sha1(), hashlib.sha256()]
+    
+    def update(self):
+        """Hash whatever was appended since the last call"""
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return
+        if (stat.st_ino, stat.st_size, stat.st_mtime_ns) == self.stale:
+            return
+        self.stale = None
+        
+        identity = (stat.st_dev, stat.st_ino)
+        rewritten = stat.st_size == self.position and self.read_mtime not in (None, stat.st_mtime_ns)
+        if identity != self.identity or stat.st_size < self.position or rewritten:
+            # New file, truncated, or modified in place after we read it
+            self.reset()
+            self.identity = identity
+        if stat.st_size == self.position:
+            return
+        
+        try:
+            with open(self.path, "rb") as f:
+                f.seek(self.position)
+                while self.position < stat.st_size:
+                    block = f.read(min(1024 * 1024, stat.st_size - self.position))
+                    if not block:
+                        break
+                    self.feed(block)
+        except OSError:
+            return
+        self.read_mtime = stat.st_mtime_ns
+    
+    def feed(self, block):
+        """Hash the next block of the file's contents"""
+        self.crc32 = zlib.crc32(block, self.crc32)
+        for digest in self.digests:
+            digest.update(block)
+        self.position += len(block)
+    
+    def finish(self):
+        """Final hashes of the complete file, None if it doesn't exist"""
+        self.update()
+        if self.identity is None:
+            return None
+        return self.result()
+    
+    def result(self):
+        """Hashes of everything fed so far"""
+        md5, sha1, sha256 = (digest.hexdigest() for digest in self.digests)
+        return {"size": self.position, "crc32": f"{self.crc32:08x}",
+                "md5": md5, "sha1": sha1, "sha256": sha256}
+
+def write_backup_manifest(path, hashes, details):
+    """Write the sidecar manifest next to a backup image, returns its path"""
+    manifest_path = path + ".manifest.json"
+    manifest = {"file": os.path.basename(path)}
+    manifest.update(hashes)
+    manifest.update(details)
+    try:
+        with open(manifest_path, "w") as f:
+            json.dump(manifest, f, indent=2)
+    except OSError:
+        return None
+    return manifest_path
+
+# Catalogue: every backup, write and verify goes into a SQLite database with
+# indexed hashes and volume labels, searchable from the UI and the command line
+CATALOGUE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS operations (
+    id INTEGER PRIMARY KEY,
+    operation TEXT NOT NULL,
+    path TEXT,
+    file TEXT,
+    size INTEGER,
+    crc32 TEXT,
+    md5 TEXT,
+    sha1 TEXT,
+    sha256 TEXT,
+    format TEXT,
+    system TEXT,
+    label TEXT COLLATE NOCASE,
+    device TEXT,
+    started TEXT,
+    finished TEXT,
+    duration REAL,
+    result TEXT,
+    tracks_retried INTEGER,
+    tracks_missing INTEGER,
+    tracks_unreadable INTEGER
+);
+CREATE INDEX IF NOT EXISTS operations_sha256 ON operations (sha256);
+CREATE INDEX IF NOT EXISTS operations_sha1 ON operations (sha1);
+CREATE INDEX IF NOT EXISTS operations_md5 ON operations (md5);
+CREATE INDEX IF NOT EXISTS operations_crc32 ON operations (crc32);
+CREATE INDEX IF NOT EXISTS operations_label ON operations (label);
+CREATE INDEX IF NOT EXISTS operations_file ON operations (file COLLATE NOCASE);
+"""
+
+hash_columns = {8: "crc32", 32: "md5", 40: "sha1", 64: "sha256"}  # Hex digest length -> column
+
+def open_catalogue():
+    """Open the catalogue database, creating it on first use"""
+    connection = sqlite3.connect(catalogue_file, timeout=10)
+    connection.row_factory = sqlite3.Row
+    connection.executescript(CATALOGUE_SCHEMA)
+    return connection
+
+def file_hashes(path):
+    """CRC32, MD5, SHA-1 and SHA-256 of a complete file"""
+    hasher = StreamingHasher(path)
+    hasher.stale = None  # Existing content is exactly what we want here
+    return hasher.finish()
+
+def read_volume_label(path, fmt=None):
+    """Volume name stored in an image's filesystem, empty if none"""
+    try:
+        size = os.path.getsize(path)
+        with open(path, "rb") as f:
+            header = f.read(2048)
+            family = (fmt or "").split(".")[0]
+            
+            if header[:3] == b"DOS" and size in (901120, 1802240):
+                f.seek(size // 2 // 512 * 512 + 512 - 80)
+                name = f.read(31)
+                return name[1:1 + name[0]].decode("latin-1")
+            
+            if header[0x400:0x402] == b"BD":
+                return header[0x425:0x425 + min(header[0x424], 27)].decode("mac_roman")
+            
+            if len(header) >= 512 and header[11:13] == b"\x00\x02":
+                # FAT: volume label entry in the root directory, else the extended BPB
+                bps, spc, reserved, fats, root_entries = struct.unpack_from("<HBHBH", header, 11)
+                spf = struct.unpack_from("<H", header, 22)[0]
+                f.seek((reserved + fats * spf) * bps)
+                root = f.read(root_entries * 32)
+                for i in range(0, len(root), 32):
+                    if root[i] == 0:
+                        break
+                    if root[i] != 0xE5 and root[i + 11] & 0x0F == 0x08:
+                        return root[i:i + 11].decode("latin-1").strip(" \x00")
+                label = header[43:54]
+                if header[38] == 0x29 and label != b"NO NAME    " and all(32 <= c < 127 for c in label):
+                    return label.decode("ascii").strip()
+                return ""
+            
+            if family == "commodore" or size in cbm_image_sizes:
+                f.seek(0x61804 if size == 819200 else 0x16590)
+                return f.read(16).rstrip(b"\xa0").decode("latin-1").strip()
+    except (OSError, struct.error, IndexError, ValueError):
+        pass
+    return ""
+
+def catalogue_record(operation, path, hashes, details):
+    """Add one operation to the catalogue (failures never interrupt the operation)"""
+    tracks = details.get("tracks") or {}
+    row = {
+        "operation": operation,
+        "path": os.path.abspath(path) if path else None,
+        "file": os.path.basename(path) if path else None,
+        "size": hashes.get("size") if hashes else None,
+        "crc32": hashes.get("crc32") if hashes else None,
+        "md5": hashes.get("md5") if hashes else None,
+        "sha1": hashes.get("sha1") if hashes else None,
+        "sha256": hashes.get("sha256") if hashes else None,
+        "format": details.get("format"),
+        "system": details.get("system"),
+        "label": details.get("label"),
+        "device": details.get("device"),
+        "started": details.get("started"),
+        "finished": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "duration": details.get("duration"),
+        "result": details.get("result"),
+        "tracks_retried": tracks.get("retried"),
+        "tracks_missing": tracks.get("missing"),
+        "tracks_unreadable": tracks.get("unreadable")
+    }
+    try:
+        with closing(open_catalogue()) as connection, connection:
+            connection.execute(
+                f"INSERT INTO operations ({', '.join(row)}) VALUES ({', '.join('?' * len(row))})",
+                list(row.values()))
+    except sqlite3.Error:
+        pass  # Silent fail, like the operation log
+
+def catalogue_move(old_path, new_path):
+    """Point catalogue entries at a file's new location"""
+    try:
+        with closing(open_catalogue()) as connection, connection:
+            connection.execute("UPDATE operations SET path = ?, file = ? WHERE path = ?",
+                               [os.path.abspath(new_path), os.path.basename(new_path), os.path.abspath(old_path)])
+    except sqlite3.Error:
+        pass
+
+def catalogue_search(text, limit=50):
+    """Find catalogue entries by hash, or label or file name prefix, newest first"""
+    text = text.strip()
+    column = hash_columns.get(len(text))
+    try:
+        with closing(open_catalogue()) as connection:
+            if column and re.fullmatch(r"[0-9a-fA-F]+", text):
+                query, params = f"SELECT * FROM operations WHERE {column} = ?", [text.lower()]
+            else:
+                # Prefix matches only, so both lookups can use their index
+                prefix = re.sub(r"([\\%_])", r"\\\1", text) + "%"
+                query = ("SELECT * FROM operations WHERE label LIKE ? ESCAPE '\\' UNION "
+                         "SELECT * FROM operations WHERE file LIKE ? ESCAPE '\\'")
+                params = [prefix, prefix]
+            return connection.execute(query + " ORDER BY id DESC LIMIT ?", params + [limit]).fetchall()
+    except sqlite3.Error:
+        return []
+
+def catalogue_recent(limit=20):
+    """Most recent catalogue entries"""
+    try:
+        with closing(open_catalogue()) as connection:
+            return connection.execute("SELECT * FROM operations ORDER BY id DESC LIMIT ?", [limit]).fetchall()
+    except sqlite3.Error:
+        return []
+
+def format_catalogue_row(row):
+    """One-line summary of a catalogue entry"""
+    label = f" [{row['label']}]" if row["label"] else ""
+    errors = sum(row[column] or 0 for column in ("tracks_retried", "tracks_missing", "tracks_unreadable"))
+    problems = f", {errors} bad track(s)" if errors else ""
+    return (f"{row['finished']} {row['operation']} {row['result']}: {row['file'] or '-'}{label}"
+            f" ({row['format'] or '?'}{problems}) sha256 {(row['sha256'] or '-')[:12]}")
+
+def run_catalogue_cli(argv):
+    """Handle --query/--hash on the command line, returns an exit code or None if not used"""
+    if len(argv) < 2 or argv[0] not in ("--query", "--hash"):
+        return None
+    
+    value = argv[1]
+    if argv[0] == "--hash" and os.path.isfile(value):
+        hashes = file_hashes(value)
+        value = hashes["sha256"] if hashes else value
+    
+    rows = catalogue_search(value, limit=1000)
+    for row in rows:
+        print(format_catalogue_row(row))
+        if row["path"]:
+            print(f"    {row['path']}")
+    if not rows:
+        print("No matching catalogue entries")
+    return 0 if rows else 1
+
+# Chunked backups: sector images are read a few cylinders at a time with
+# --tracks, and a checkpoint next to the image lets a cancelled, timed out or
+# disconnected backup resume with the chunks it has not read yet
+BACKUP_CHUNK_CYLINDERS = 10
+
+def backup_geometry(gw_format):
+    """(cylinders, heads, track_bytes) of a sector image backup, None if tracks vary in size"""
+    geometry = get_format_geometry(gw_format) if gw_format else None
+    if not geometry or not geometry[2]:
+        return None
+    cyls, heads, spt, bps = geometry
+    return cyls, heads, spt * bps
+
+def backup_checkpoint_path(path):
+    """Checkpoint file kept next to an unfinished chunked backup"""
+    return path + ".checkpoint.json"
+
+def backup_part_path(path, chunk):
+    """Image file for one chunk, keeping the extension gw uses to pick the image type"""
+    root, ext = os.path.splitext(path)
+    return f"{root}.part{chunk['start']:02d}{ext}"
+
+def load_backup_checkpoint(path, key, geometry):
+    """Checkpoint of an earlier attempt at the same backup, or a fresh one"""
+    try:
+        with open(backup_checkpoint_path(path), "r") as f:
+            checkpoint = json.load(f)
+        if checkpoint.get("key") == key and checkpoint.get("geometry") == list(geometry):
+            return checkpoint
+    except (OSError, ValueError):
+        pass
+    return new_backup_checkpoint(key, geometry)
+
+def new_backup_checkpoint(key, geometry):
+    """Checkpoint for a backup with no chunks read yet"""
+    cyls = geometry[0]
+    return {
+        "key": key,
+        "geometry": list(geometry),
+        "fingerprint": None,
+        "chunks": [{"start": start, "end": min(start + BACKUP_CHUNK_CYLINDERS, cyls) - 1, "done": False}
+                   for start in range(0, cyls, BACKUP_CHUNK_CYLINDERS)],
+        "tracks": []
+    }
+
+def track_zero_crc(path, track_bytes):
+    """CRC32 of cylinder 0 head 0 at the start of an image, None if it is shorter"""
+    try:
+        with open(path, "rb") as f:
+            data = f.read(track_bytes)
+    except OSError:
+        return None
+    return f"{zlib.crc32(data):08x}" if len(data) == track_bytes else None
+
+def disk_fingerprint(gui, path, args, track_bytes):
+    """CRC32 of track 0 of the disk in the drive, None if it could not be read"""
+    temp_file = temp_file_name("temp_identity", os.path.splitext(path)[1])
+    identity_args = [temp_file if arg == path else arg for arg in args] + ["--tracks", "c=0:h=0"]
+    try:
+        if not run_greaseweazle_command(gui, "Check disk identity", identity_args):
+            return None
+        return track_zero_crc(temp_file, track_bytes)
+    finally:
+        remove_files(temp_file)
+
+def save_backup_checkpoint(path, checkpoint):
+    """Write the checkpoint atomically so a crash never leaves half a file"""
+    temp_path = backup_checkpoint_path(path) + ".tmp"
+    try:
+        with open(temp_path, "w") as f:
+            json.dump(checkpoint, f, indent=2)
+        os.replace(temp_path, backup_checkpoint_path(path))
+    except OSError:
+        pass
+
+def assemble_backup_chunks(path, checkpoint):
+    """Join the chunk images into the final image, then remove the parts and checkpoint
+    
+    Returns the hashes of the final image, computed while it is written.
+    """
+    cyls, heads, track_bytes = checkpoint["geometry"]
+    cyl_bytes = heads * track_bytes
+    temp_path = path + ".tmp"
+    hasher = StreamingHasher(temp_path)
+    with open(temp_path, "wb") as out:
+        for chunk in checkpoint["chunks"]:
+            part = backup_part_path(path, chunk)
+            length = (chunk["end"] - chunk["start"] + 1) * cyl_bytes
+            size = os.path.getsize(part)
+            # gw either writes just the requested cylinders or a full-size image
+            if size == length:
+                offset = 0
+            elif size == cyls * cyl_bytes:
+                offset = chunk["start"] * cyl_bytes
+            else:
+                raise ValueError(f"{os.path.basename(part)} is {size:,} bytes, expected {length:,}")
+            with open(part, "rb") as source:
+                source.seek(offset)
+                copy_range(source, out, length, on_block=hasher.feed)
+    os.replace(temp_path, path)
+    
+    for chunk in checkpoint["chunks"]:
+        try:
+            os.remove(backup_part_path(path, chunk))
+        except OSError:
+            pass
+    try:
+        os.remove(backup_checkpoint_path(path))
+    except OSError:
+        pass
+    return hasher.result()
+
+def perform_chunked_backup(gui, path, args, key, geometry):
+    """Read a sector image chunk by chunk, resuming from a checkpoint
+    
+    Returns the hashes of the assembled image, or None if it is incomplete.
+    """
+    filename = os.path.basename(path)
+    checkpoint = load_backup_checkpoint(path, key, geometry)
+    
+    # Resume only with the same disk in the drive: track 0 must match the
+    # fingerprint taken when the first chunk was read (or that chunk's image)
+    first_part = backup_part_path(path, checkpoint["chunks"][0])
+    if checkpoint["chunks"][0]["done"] and os.path.exists(first_part):
+        expected = checkpoint.get("fingerprint") or track_zero_crc(first_part, geometry[2])
+        if disk_fingerprint(gui, path, args, geometry[2]) != expected:
+            gui.add_output_line("⚠ Disk does not match the interrupted backup, starting over")
+            remove_files(*(backup_part_path(path, chunk) for chunk in checkpoint["chunks"]))
+            checkpoint = new_backup_checkpoint(key, geometry)
+    chunks = checkpoint["chunks"]
+    
+    # Track statuses of every chunk, including those read by an earlier attempt
+    combined = ProgressTracker(geometry[0] * geometry[1], geometry[:2])
+    for cyl, head, status, *sectors in checkpoint["tracks"]:
+        combined.tracks[(cyl, head)] = status
+        # Older checkpoints stored only [cyl, head, status]
+        if len(sectors) == 2 and sectors[1]:
+            combined.sectors[(cyl, head)] = tuple(sectors)
+    
+    done = sum(1 for chunk in chunks if chunk["done"] and os.path.exists(backup_part_path(path, chunk)))
+    if done:
+        gui.add_output_line(f"Resuming: {done}/{len(chunks)} chunks already read")
+    
+    result = True
+    for chunk in chunks:
+        part = backup_part_path(path, chunk)
+        if chunk["done"] and os.path.exists(part):
+            continue
+        
+        chunk_args = [part if arg == path else arg for arg in args]
+        chunk_args += ["--tracks", f"c={chunk['start']}-{chunk['end']}"]
+        title = f"Backup {filename} cyl {chunk['start']}-{chunk['end']}"
+        chunk["done"] = run_greaseweazle_command(gui, title, chunk_args) and os.path.exists(part)
+        if chunk["done"] and chunk["start"] == 0:
+            checkpoint["fingerprint"] = track_zero_crc(part, geometry[2])
+        
+        if gui.progress:
+            combined.tracks.update(gui.progress.tracks)
+            combined.sectors.update(gui.progress.sectors)
+        checkpoint["tracks"] = [[cyl, head, status] + list(combined.sectors.get((cyl, head), (None, None)))
+                                for (cyl, head), status in sorted(combined.tracks.items())]
+        save_backup_checkpoint(path, checkpoint)
+        
+        if not chunk["done"]:
+            gui.add_output_line(f"⚠ Stopped at cylinder {chunk['start']}: run the backup again to resume")
+            result = False
+            break
+    
+    gui.progress = combined
+    if not result:
+        return None
+    
+    try:
+        hashes = assemble_backup_chunks(path, checkpoint)
+    except (OSError, ValueError) as e:
+        gui.add_output_line(f"✗ Could not assemble {filename}: {e}")
+        return None
+    gui.add_output_line(f"✓ Assembled {len(chunks)} chunks")
+    return hashes
+
+# Selective re-read: tracks that still have missing sectors after a backup
+# are read again on their own with escalating retry settings, and a re-read
+# that recovers more sectors replaces the track in the image
+REREAD_LEVELS = [(5, 3), (10, 5), (20, 8)]  # (--retries, --revs) per pass
+REREAD_UNREADABLE_PASSES = 2  # Passes before giving up on a track with no sectors at all
+
+def merge_reread_track(path, part, geometry, cyl, head, heads_read):
+    """Copy one re-read track from a part image into the backup image"""
+    cyls, heads, track_bytes = geometry
+    size = os.path.getsize(part)
+    if size == cyls * heads * track_bytes:
+        offset = (cyl * heads + head) * track_bytes
+    elif size == len(heads_read) * track_bytes:
+        offset = heads_read.index(head) * track_bytes
+    else:
+        raise ValueError(f"{os.path.basename(part)} is {size:,} bytes")
+    with open(part, "rb") as source, open(path, "r+b") as target:
+        source.seek(offset)
+        target.seek((cyl * heads + head) * track_bytes)
+        target.write(source.read(track_bytes))
+
+def reread_failed_tracks(gui, path, args, geometry, tracker):
+    """Re-read the failed tracks of a finished backup, updating tracker, returns tracks recovered"""
+    root, ext = os.path.splitext(path)
+    part = f"{root}.reread{ext}"
+    recovered = 0
+    empty_passes = collections.Counter()
+    cancelled = False
+    
+    for level, (retries, revs) in enumerate(REREAD_LEVELS, 1):
+        failed = [key for key in tracker.failed_tracks()
+                  if empty_passes[key] < REREAD_UNREADABLE_PASSES]
+        if not failed or cancelled:
+            break
+        gui.add_output_line(f"Re-read pass {level}: {len(failed)} track(s), --retries {retries} --revs {revs}")
+        
+        by_cylinder = collections.defaultdict(list)
+        for cyl, head in failed:
+            by_cylinder[cyl].append(head)
+        
+        for cyl, heads_read in sorted(by_cylinder.items()):
+            reread_args = [part if arg == path else arg for arg in args]
+            reread_args += ["--tracks", f"c={cyl}:h={','.join(map(str, heads_read))}",
+                            "--retries", str(retries), "--revs", str(revs)]
+            ok = run_greaseweazle_command(gui, f"Re-read cyl {cyl}", reread_args)
+            if gui.last_exit_code is None:
+                # Cancelled or timed out: keep what has been recovered so far
+                cancelled = True
+                break
+            if not ok or not os.path.exists(part):
+                continue
+            
+            for head in heads_read:
+                key = (cyl, head)
+                found, total = gui.progress.sectors.get(key, (0, 0))
+                old_found = tracker.sectors.get(key, (0, 0))[0]
+                if found <= old_found:
+                    empty_passes[key] += not found
+                    continue
+                try:
+                    merge_reread_track(path, part, geometry, cyl, head, heads_read)
+                except (OSError, ValueError) as e:
+                    gui.add_output_line(f"✗ Could not merge T{cyl}.{head}: {e}")
+                    continue
+                tracker.sectors[key] = (found, total)
+                tracker.tracks[key] = "retried" if found == total else "missing"
+                if found == total:
+                    recovered += 1
+                    gui.add_output_line(f"✓ Recovered T{cyl}.{head}")
+    
+    try:
+        os.remove(part)
+    except OSError:
+        pass
+    
+    gui.progress = tracker
+    remaining = len(tracker.failed_tracks())
+    gui.add_output_line(f"Re-read: {recovered} track(s) recovered, {remaining} still failing")
+    return recovered
+
+# Read flux once, decode many: one flux capture is converted offline to every
+# candidate sector format in parallel and the cleanest decode is kept
+CONVERT_TIMEOUT = 300
+CONVERT_MAX_WORKERS = max(2, os.cpu_count() or 2)
+
+def candidate_formats(system):
+    """gw formats worth trying for a system, the configured disk size first"""
+    profile = format_profiles.get(system, {})
+    formats = [profile[default_disk_size][0]] if default_disk_size in profile else []
+    for fmt, _, _ in profile.values():
+        if fmt not in formats:
+            formats.append(fmt)
+    return formats
+
+def score_gw_output(lines):
+    """(missing sectors, sectors found, tracks) summed over the track lines of gw output"""
+    sectors = {}
+    for line in lines:
+        event = parse_gw_line(line)
+        if event and event["total"]:
+            sectors[(event["cyl"], event["head"])] = (event["found"], event["total"])
+    found = sum(found for found, total in sectors.values())
+    missing = sum(total - found for found, total in sectors.values())
+    return missing, found, len(sectors)
+
+def convert_flux(flux_path, image_path, fmt):
+    """Run gw convert for one format, returns (fmt, ok, missing, found, tracks)"""
+    args = [gw_path, "convert", flux_path, image_path, "--format", fmt]
+    try:
+        proc = subprocess.run(args, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True,
+                              errors="replace", timeout=CONVERT_TIMEOUT)
+    except (OSError, subprocess.TimeoutExpired):
+        return fmt, False, 0, 0, 0
+    missing, found, tracks = score_gw_output(proc.stdout.splitlines())
+    ok = proc.returncode == 0 and tracks > 0 and os.path.exists(image_path)
+    return fmt, ok, missing, found, tracks
+
+def convert_flux_candidates(gui, flux_path, image_path, formats):
+    """Convert a flux file to each format in parallel, keep the best decode as image_path"""
+    root, ext = os.path.splitext(image_path)
+    candidates = {fmt: f"{root}.{fmt}{ext}" for fmt in formats}
+    gui.add_output_line(f"Decoding {os.path.basename(flux_path)} as {len(formats)} format(s)...")
+    gui.refresh_all()
+    
+    results = []
+    with concurrent.futures.ThreadPoolExecutor(max_workers=min(CONVERT_MAX_WORKERS, len(formats))) as pool:
+        futures = [pool.submit(convert_flux, flux_path, candidates[fmt], fmt) for fmt in formats]
+        for future in concurrent.futures.as_completed(futures):
+            fmt, ok, missing, found, tracks = future.result()
+            results.append((fmt, ok, missing, found, tracks))
+            status = f"{found} sectors, {missing} missing on {tracks} tracks" if ok else "no decode"
+            gui.add_output_line(f"  {fmt}: {status}")
+            gui.refresh_all()
+    
+    # Fewest missing sectors wins, then the most data, then the preferred format
+    decoded = [result for result in results if result[1] and result[3]]
+    best = min(decoded, key=lambda r: (r[2], -r[3], formats.index(r[0])), default=None)
+    for fmt, candidate in candidates.items():
+        try:
+            if best and fmt == best[0]:
+                os.replace(candidate, image_path)
+            else:
+                os.remove(candidate)
+        except OSError:
+            pass
+    return best
+
+def perform_flux_image_backup(gui, path, system):
+    """Capture flux once next to path, then decode it into the sector image at path"""
+    flux_path = os.path.splitext(path)[0] + ".scp"
+    if not perform_backup_disk(gui, "FLUX", flux_path, system, compress=False):
+        return False
+    
+    started = time.time()
+    best = convert_flux_candidates(gui, flux_path, path, candidate_formats(system))
+    schedule_flux_compression(gui, flux_path)
+    if not best:
+        gui.add_output_line("✗ No sector format could decode the flux, only the .scp was kept")
+        return False
+    
+    fmt, ok, missing, found, tracks = best
+    hashes = file_hashes(path)
+    details = {
+        "backup_type": "FLUX_IMAGE",
+        "system": system,
+        "format": fmt,
+        "label": read_volume_label(path, fmt),
+        "source": os.path.basename(flux_path),
+        "started": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(started)),
+        "duration": round(time.time() - started, 1),
+        "sectors": {"found": found, "missing": missing}
+    }
+    write_backup_manifest(path, hashes, details)
+    catalogue_record("backup", path, hashes, dict(details, result="OK" if not missing else "PARTIAL"))
+    
+    gui.add_output_line(f"✓ Image decoded as {fmt}: {os.path.basename(path)}")
+    if missing:
+        gui.add_output_line(f"⚠ {missing} sector(s) could not be decoded")
+    return True
+
+# AUTO_FORMAT: a two-cylinder flux sample is decoded as every candidate format
+# before the real read, remembering the answer per disk fingerprint. Cylinder 0
+# alone decodes equally well as 40 and 80 cylinder formats (ibm.360/ibm.720),
+# cylinder 41 only exists on the latter
+PROBE_TRACKS = "c=0,41:h=0-1"
+
+def get_format_probe_cache():
+    """Load the probe cache on first use"""
+    global format_probe_cache
+    if format_probe_cache is None:
+        format_probe_cache = {}
+        try:
+            with open(format_probe_file, "r") as f:
+                format_probe_cache = json.load(f)
+        except Exception:
+            pass  # Missing or corrupted cache, rebuilt by the next probe
+    return format_probe_cache
+
+def save_format_probe_cache():
+    """Write the probe cache to disk"""
+    try:
+        with open(format_probe_file, "w") as f:
+            json.dump(get_format_probe_cache(), f, indent=2)
+    except Exception:
+        pass  # Silent fail, the cache is only an optimisation
+
+def remove_files(*paths):
+    """Delete files that may or may not exist"""
+    for path in paths:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+def probe_disk_format(gui, system):
+    """Read the probe cylinders as flux and return the gw format that decodes them best, None if unknown"""
+    formats = candidate_formats(system)
+    if not formats:
+        return None
+    
+    probe = temp_file_name("temp_probe", ".scp")
+    args = [gw_path, "read", probe, "--device", active_port(), "--tracks", PROBE_TRACKS,
+            "--revs", "1"] + drive_arg()
+    if not run_greaseweazle_command(gui, "Probe cylinders 0 and 41", args, timeout=60):
+        remove_files(probe)
+        return None
+    
+    root, ext = os.path.splitext(probe)[0], get_default_extension(system)
+    sample = f"{root}{ext}"
+    try:
+        # A clean decode with the preferred format fingerprints the disk by the
+        # sample, so disks seen before skip the other decodes. The probed tracks
+        # are part of the key so answers from a different sample are not reused
+        fmt, ok, missing, found, tracks = convert_flux(probe, sample, formats[0])
+        hashes = file_hashes(sample) if ok and found and not missing else None
+        fingerprint = f"{system}:{PROBE_TRACKS}:{hashes['sha1']}" if hashes else None
+        cache = get_format_probe_cache()
+        if fingerprint in cache:
+            gui.add_output_line(f"✓ Known disk, using {cache[fingerprint]}")
+            return cache[fingerprint]
+        
+        best = convert_flux_candidates(gui, probe, sample, formats)
+        if not best:
+            return None
+        if fingerprint:
+            cache[fingerprint] = best[0]
+            save_format_probe_cache()
+        return best[0]
+    finally:
+        remove_files(probe, sample)
+
+# Background flux compression: finished .scp captures are compressed on a
+# worker pool while the next disk is read, and decode_image unpacks them
+# again transparently when they are written back
+flux_compressors = {
+    "off": ("", "Keep flux captures uncompressed"),
+    "xz": (".xz", "xz (LZMA), smallest files"),
+    "gzip": (".gz", "gzip, fastest")
+}
+COMPRESS_MAX_WORKERS = max(1, (os.cpu_count() or 2) - 1)  # Leave a core for the UI and gw
+compression_pool = None
+compression_jobs = []  # Futures of every compression scheduled this session
+
+def compress_file(path, method):
+    """Compress path next to itself and remove the original, returns the new path"""
+    target = path + flux_compressors[method][0]
+    temp_target = target + ".tmp"
+    opener = lzma.open if method == "xz" else gzip.open
+    try:
+        with open(path, "rb") as source, opener(temp_target, "wb") as out:
+            copy_range(source, out, None)
+        os.replace(temp_target, target)
+    except Exception:
+        remove_files(temp_target)
+        raise
+    os.remove(path)
+    
+    # The manifest and catalogue follow the file, keeping the capture's own hashes too
+    hashes = file_hashes(target)
+    move_backup_manifest(path, target, hashes, method)
+    catalogue_move(path, target)
+    catalogue_record("compress", target, hashes, {"format": method, "result": "OK"})
+    return target
+
+def move_backup_manifest(old_path, new_path, hashes, method):
+    """Rewrite a backup's manifest for its compressed file, the original hashes kept under uncompressed"""
+    old_manifest = old_path + ".manifest.json"
+    try:
+        with open(old_manifest, "r") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    
+    uncompressed = {key: manifest.pop(key) for key in ("file",) + tuple(hashes) if key in manifest}
+    manifest = dict({"file": os.path.basename(new_path)}, **hashes, compression=method,
+                    uncompressed=uncompressed, **manifest)
+    new_manifest = new_path + ".manifest.json"
+    try:
+        with open(new_manifest + ".tmp", "w") as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(new_manifest + ".tmp", new_manifest)
+    except OSError:
+        remove_files(new_manifest + ".tmp")
+        return None
+    remove_files(old_manifest)
+    return new_manifest
+
+def schedule_flux_compression(gui, path):
+    """Queue a flux capture for background compression if enabled"""
+    global compression_pool
+    if flux_compression not in flux_compressors or flux_compression == "off" or not os.path.exists(path):
+        return None
+    if compression_pool is None:
+        compression_pool = concurrent.futures.ThreadPoolExecutor(max_workers=COMPRESS_MAX_WORKERS,
+                                                                 thread_name_prefix="compress")
+    future = compression_pool.submit(compress_file, path, flux_compression)
+    compression_jobs.append(future)
+    gui.add_output_line(f"Compressing {os.path.basename(path)} in the background ({flux_compression})")
+    return future
+
+def pending_compressions():
+    """Number of scheduled compressions not finished yet"""
+    return sum(1 for future in compression_jobs if not future.done())
+
+def finish_flux_compression():
+    """Wait for all scheduled compressions, returns the number that failed"""
+    failed = 0
+    for future in concurrent.futures.as_completed(compression_jobs):
+        if future.exception():
+            failed += 1
+    if compression_pool:
+        compression_pool.shutdown()
+    return failed
+
+def get_backup_target(backup_type, system=None):
+    """Get (default_ext, filetypes, gw_format) for a backup type and system"""
+    system = system or target_system
+    
+    # Determine file extension and format
+    if backup_type == "FLUX":
+        default_ext = ".scp"
+        filetypes = [("Flux Images", "*.scp"), ("All", "*.*")]
+        gw_format = "scp"
+    else:
+        default_ext = get_default_extension(system)
+        filetypes = get_file_extensions_for_system(system, "write")
+        
+        format_map = {
+            "PC": "ibm.1440",
+            "Amiga": None,
+            "Apple": None, 
+            "Atari": None,
+            "C64": None,
+            "ZXSpectrum": None
+        }
+        gw_format = format_map.get(system)
+    return default_ext, filetypes, gw_format
+
+def perform_backup_disk(gui, backup_type, path, system=None, compress=True):
+    """Read the disk into path, returns True on success"""
+    system = system or target_system
+    if backup_type == "FLUX_IMAGE":
+        return perform_flux_image_backup(gui, path, system)
+    
+    default_ext, filetypes, gw_format = get_backup_target(backup_type, system)
+    filename = os.path.basename(path)
+    gui.add_output_line(f"Backup to: {filename}")
+    
+    if backup_type == "AUTO_FORMAT":
+        gw_format = probe_disk_format(gui, system)
+        if not gw_format:
+            gui.add_output_line(f"✗ Could not identify the {system} format from its first cylinders")
+            return False
+        gui.add_output_line(f"✓ Detected format: {gw_format}")
+    
+    # Build command
+    if backup_type == "FLUX":
+        args = [gw_path, "read", path, "--device", active_port(), "--format", "scp"] + drive_arg()
+    elif gw_format and (system == "PC" or backup_type == "AUTO_FORMAT"):
+        args = [gw_path, "read", path, "--device", active_port(), "--format", gw_format] + drive_arg()
+    else:
+        args = [gw_path, "read", path, "--device", active_port()] + drive_arg()
+    
+    # Sector images of a known format are read in resumable chunks, flux and
+    # images gw picks the format for in a single pass
+    geometry = backup_geometry(gw_format) if backup_type != "FLUX" and "--format" in args else None
+    started = time.time()
+    if geometry:
+        key = {"backup_type": backup_type, "system": system, "format": gw_format}
+        hashes = perform_chunked_backup(gui, path, args, key, geometry)
+        result = hashes is not None
+        if result and gui.progress.failed_tracks():
+            # Re-read tracks are merged into the image, so hash it again if any were
+            assembled = os.stat(path).st_mtime_ns
+            reread_failed_tracks(gui, path, args, geometry, gui.progress)
+            if os.stat(path).st_mtime_ns != assembled:
+                hashes = file_hashes(path)
+    else:
+        hasher = StreamingHasher(path)
+        result = run_greaseweazle_command(gui, f"Backup to {filename}", args, on_poll=hasher.update)
+        hashes = hasher.finish() if os.path.exists(path) else None
+    
+    if hashes:
+        tracker = gui.progress
+        details = {
+            "backup_type": backup_type,
+            "system": system,
+            "format": args[args.index("--format") + 1] if "--format" in args else "auto",
+            "device": active_port(),
+            "drive": drive_arg()[1],
+            "started": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(started)),
+            "duration": round(time.time() - started, 1),
+            "gw_exit_status": gui.last_exit_code,
+            "tracks": {status: tracker.count(status) for status in ("ok", "retried", "missing", "unreadable")}
+                      if tracker else {}
+        }
+        details["label"] = read_volume_label(path, details["format"])
+        manifest_path = write_backup_manifest(path, hashes, details)
+        catalogue_record("backup", path, hashes, dict(details, result="OK" if result else "FAILED"))
+        if manifest_path:
+            gui.add_output_line(f"Manifest: {os.path.basename(manifest_path)} (sha256 {hashes['sha256'][:16]}...)")
+    
+    if result and os.path.exists(path):
+        final_size = os.path.getsize(path)
+        gui.add_output_line(f"✓ Backup completed: {final_size:,} bytes")
+        if backup_type == "FLUX" and compress:
+            schedule_flux_compression(gui, path)
+    return result
+
+def execute_backup_disk(gui, backup_type):
+    """Execute backup operation"""
+    gui.clear_output()
+    gui.add_output_line("BACKUP DISK TO IMAGE")
+    gui.add_output_line(f"Type: {backup_type}")
+    gui.add_output_line("Opening save dialog...")
+    gui.refresh_all()
+    
+    default_ext, filetypes, gw_format = get_backup_target(backup_type)
+    
+    path = open_file_browser_safe(f"Save {target_system} backup", filetypes, mode="save")
+    gui.stdscr.refresh()
+    
+    if not path:
+        gui.add_output_line("No file selected")
+        gui.wait_for_continue()
+        return
+    
+    if not path.lower().endswith(default_ext.lower()):
+        path += default_ext
+    
+    perform_backup_disk(gui, backup_type, path)
+    gui.wait_for_continue()
+
+def perform_clean_disk(gui):
+    """Erase the whole disk, returns True on success"""
+    args = [gw_path, "erase", "--device", active_port()] + drive_arg()
+    result = run_greaseweazle_command(gui, "Clean Disk", args)
+    
+    if result:
+        gui.add_output_line("✓ Disk cleaned successfully")
+    return result
+
+def execute_clean_disk(gui, format_type):
+    """Execute disk cleaning operation"""
+    gui.clear_output()
+    gui.add_output_line("CLEAN DISK OPERATION")
+    gui.add_output_line(f"Format: {format_type}")
+    gui.add_output_line("⚠ WARNING: All data will be lost!")
+    
+    if not confirm_operation(gui, "Press ENTER to confirm, ESC to cancel"):
+        gui.add_output_line("Operation cancelled")
+        gui.wait_for_continue()
+        return
+    
+    perform_clean_disk(gui)
+    gui.wait_for_continue()
+
+def perform_verify_disk(gui, verify_type, system=None):
+    """Read the disk back to check it, returns True if verification passed"""
+    system = system or target_system
+    if verify_type == "SAMPLED":
+        return perform_sampled_verify(gui, system)
+    
+    # Use proper file extension
+    ext = get_default_extension(system)
+    temp_file = temp_file_name("temp_verify", ext)
+    
+    if verify_type == "QUICK":
+        args = [gw_path, "read", temp_file, "--device", active_port(), "--tracks", "0-5"] + drive_arg()
+        title = "Quick Verify (6 tracks)"
+    else:  # FULL
+        args = [gw_path, "read", temp_file, "--device", active_port()] + drive_arg()
+        title = "Full Verify (complete disk)"
+    
+    # The read goes to the scratch folder and is hashed while gw writes it,
+    # so nothing but the verdict outlives the read
+    hasher = StreamingHasher(temp_file)
+    started = time.time()
+    try:
+        result = run_greaseweazle_command(gui, title, args, on_poll=hasher.update)
+        hashes = hasher.finish()
+        label = read_volume_label(temp_file) if hashes and verify_type == "FULL" else ""
+    finally:
+        remove_files(temp_file)
+    
+    tracker = gui.progress
+    failed = tracker.failed_tracks() if tracker else []
+    passed = bool(result and hashes and not failed)
+    if hashes:
+        catalogue_record(f"verify {verify_type.lower()}", None, hashes, {
+            "system": system,
+            "label": label,
+            "device": active_port(),
+            "started": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(started)),
+            "duration": round(time.time() - started, 1),
+            "result": "PASSED" if passed else "FAILED",
+            "tracks": {status: tracker.count(status) for status in ("retried", "missing", "unreadable")}
+                      if tracker else {}
+        })
+    
+    if tracker and tracker.sectors:
+        found = sum(found for found, total in tracker.sectors.values())
+        total = sum(total for found, total in tracker.sectors.values())
+        gui.add_output_line(f"Sectors: {found:,} of {total:,} read on {len(tracker.sectors)} track(s)")
+        for cyl, head in failed[:COMPARE_REPORT_TRACKS]:
+            found, total = tracker.sectors.get((cyl, head), (0, 0))
+            gui.add_output_line(f"  T{cyl}.{head}: {total - found} of {total} sector(s) missing")
+    
+    if passed:
+        gui.add_output_line(f"✓ Verification PASSED ({hashes['size']:,} bytes, sha256 {hashes['sha256'][:16]}...)")
+        return True
+    elif result and not hashes:
+        gui.add_output_line("⚠ Verification completed but no data")
+    else:
+        gui.add_output_line("✗ Verification FAILED")
+    return False
+
+# Sampled verify: reads cylinders spread evenly over the disk (one random
+# cylinder per stratum, always including the outermost and innermost) until
+# the sample or the time budget is used up, then estimates the disk's health
+SAMPLE_BATCH_CYLINDERS = 4  # Cylinders read per gw command
+SAMPLE_Z = 1.96  # 95% confidence
+
+def sample_cylinders(cylinders, count):
+    """Stratified random cylinders in reading order, spread so any prefix covers the disk"""
+    count = max(2, min(count, cylinders))
+    strata = [(cylinders * i // count, cylinders * (i + 1) // count) for i in range(count)]
+    picks = [random.randrange(low, high) for low, high in strata[1:-1]]
+    random.shuffle(picks)
+    return [0, cylinders - 1] + picks
+
+def wilson_interval(successes, trials, z=SAMPLE_Z):
+    """Wilson score interval for a proportion, (low, high)"""
+    if not trials:
+        return 0.0, 1.0
+    p = successes / trials
+    denominator = 1 + z * z / trials
+    centre = (p + z * z / (2 * trials)) / denominator
+    margin = z * ((p * (1 - p) / trials + z * z / (4 * trials * trials)) ** 0.5) / denominator
+    return max(0.0, centre - margin), min(1.0, centre + margin)
+
+def perform_sampled_verify(gui, system=None):
+    """Read a stratified sample of cylinders within the time budget, returns True if all were good"""
+    system = system or target_system
+    
+    # The configured disk size, otherwise whatever the probe cylinders decode as
+    entry = format_profiles.get(system, {}).get(default_disk_size)
+    fmt = entry[0] if entry else probe_disk_format(gui, system)
+    geometry = get_format_geometry(fmt) if fmt else None
+    if not geometry:
+        gui.add_output_line(f"✗ Could not tell the {system} disk format, set the disk size first")
+        return False
+    
+    cylinders, heads = geometry[0], geometry[1]
+    heads_spec = "0-1" if heads == 2 else "0"
+    order = sample_cylinders(cylinders, max(2, verify_sample_tracks // heads))
+    temp_file = temp_file_name("temp_verify", get_default_extension(system))
+    gui.add_output_line(f"Sampling {len(order)} of {cylinders} cylinders ({fmt}), "
+                        f"budget {verify_time_budget}s")
+    
+    started = time.time()
+    tracks = {}
+    try:
+        for first in range(0, len(order), SAMPLE_BATCH_CYLINDERS):
+            remaining = verify_time_budget - (time.time() - started)
+            if remaining <= 0:
+                gui.add_output_line("⚠ Time budget used up, estimating from the tracks read so far")
+                break
+            batch = order[first:first + SAMPLE_BATCH_CYLINDERS]
+            spec = f"c={','.join(map(str, sorted(batch)))}:h={heads_spec}"
+            args = [gw_path, "read", temp_file, "--device", active_port(), "--format", fmt,
+                    "--tracks", spec] + drive_arg()
+            ok = run_greaseweazle_command(gui, f"Sampled Verify {spec}", args, timeout=max(30, int(remaining)))
+            if gui.last_exit_code is None:
+                break  # Cancelled or timed out
+            if ok and gui.progress:
+                tracks.update(gui.progress.tracks)
+            elif not ok:
+                # gw failed outright: the whole batch counts against the estimate
+                tracks.update(((cyl, head), "unreadable") for cyl in batch for head in range(heads))
+    finally:
+        remove_files(temp_file)
+    
+    if not tracks:
+        gui.add_output_line("✗ No tracks could be sampled")
+        return False
+    
+    good = sum(1 for status in tracks.values() if status in ("ok", "retried"))
+    low, high = wilson_interval(good, len(tracks))
+    total_tracks = cylinders * heads
+    bad = sorted(key for key, status in tracks.items() if status not in ("ok", "retried"))
+    gui.add_output_line(f"Sampled {len(tracks)} of {total_tracks} tracks in {time.time() - started:.0f}s: "
+                        f"{good} good, {len(bad)} bad")
+    gui.add_output_line(f"Health: {good / len(tracks):.0%} (95% confidence {low:.0%}-{high:.0%})")
+    gui.add_output_line(f"Estimated bad tracks on the disk: {round((1 - high) * total_tracks)}-"
+                        f"{round((1 - low) * total_tracks)} of {total_tracks}")
+    if bad:
+        gui.add_output_line("Bad: " + ", ".join(f"T{cyl}.{head}" for cyl, head in bad[:20]))
+        gui.add_output_line("✗ Sampled verification FAILED")
+        return False
+    gui.add_output_line("✓ Sampled verification PASSED")
+    return True
+
+# Template Compare: read the disk, then diff it sector by sector against a
+# template or image, both memory-mapped (vectorised with NumPy if installed)
+COMPARE_REPORT_TRACKS = 40  # Differing tracks listed individually
+SECTOR_BASE_ZERO = {"amiga", "acorn", "commodore", "mac"}  # Families that number sectors from 0
+
+def sector_layout(fmt):
+    """(cyl, head, sectors) per track in image file order, None if the geometry is unknown"""
+    geometry = get_format_geometry(fmt)
+    if not geometry:
+        return None
+    cyls, heads, spt, bps = geometry
+    family = fmt.split(".")[0]
+    if spt:
+        return [(cyl, head, spt) for cyl in range(cyls) for head in range(heads)]
+    if family == "commodore":
+        # D64/D71 store all of side 0 before side 1
+        return [(cyl, head, cbm_track_sectors(cyl + 1)) for head in range(heads) for cyl in range(cyls)]
+    if family == "mac":
+        return [(cyl, head, next(spt for next_zone, spt in gcr_zones["mac"] if cyl < next_zone))
+                for cyl in range(cyls) for head in range(heads)]
+    return None
+
+def differing_sectors(data_a, data_b, bps, layout):
+    """Indices of the sectors that differ between two equally long buffers"""
+    if numpy is not None:
+        a = numpy.frombuffer(data_a, dtype=numpy.uint8).reshape(-1, bps)
+        b = numpy.frombuffer(data_b, dtype=numpy.uint8).reshape(-1, bps)
+        return numpy.flatnonzero((a != b).any(axis=1)).tolist()
+    
+    # Compare a track at a time, only looking at single sectors inside differing tracks
+    differences = []
+    first = 0
+    for cyl, head, spt in layout:
+        start, end = first * bps, (first + spt) * bps
+        if end > len(data_a):
+            break
+        if data_a[start:end] != data_b[start:end]:
+            differences.extend(first + sector for sector in range(spt)
+                               if data_a[start + sector * bps:start + (sector + 1) * bps]
+                               != data_b[start + sector * bps:start + (sector + 1) * bps])
+        first += spt
+    return differences
+
+def compare_images(path_a, path_b, fmt):
+    """Sector diff of two images, returns (differences as (cyl, head, sector), sectors compared, extra bytes)"""
+    layout = sector_layout(fmt)
+    if not layout:
+        raise ValueError(f"unknown geometry for {fmt}")
+    bps = get_format_geometry(fmt)[3]
+    
+    # Map each sector index back to its track
+    locations = [(cyl, head, sector) for cyl, head, spt in layout for sector in range(spt)]
+    base = 0 if fmt.split(".")[0] in SECTOR_BASE_ZERO else 1
+    
+    with open(path_a, "rb") as file_a, open(path_b, "rb") as file_b:
+        size_a, size_b = os.fstat(file_a.fileno()).st_size, os.fstat(file_b.fileno()).st_size
+        common = min(size_a, size_b, len(locations) * bps) // bps * bps
+        if not common:
+            return [], 0, abs(size_a - size_b)
+        with mmap.mmap(file_a.fileno(), 0, access=mmap.ACCESS_READ) as map_a, \
+             mmap.mmap(file_b.fileno(), 0, access=mmap.ACCESS_READ) as map_b:
+            view_a, view_b = memoryview(map_a)[:common], memoryview(map_b)[:common]
+            try:
+                indices = differing_sectors(view_a, view_b, bps, layout)
+            finally:
+                view_a.release()
+                view_b.release()
+    
+    differences = [(locations[i][0], locations[i][1], locations[i][2] + base) for i in indices]
+    return differences, common // bps, abs(size_a - size_b)
+
+def perform_compare_verify(gui, reference, fmt, system=None):
+    """Read the disk with fmt and compare it sector by sector with reference, returns True if identical"""
+    system = system or target_system
+    temp_file = temp_file_name("temp_verify", os.path.splitext(reference)[1] or get_default_extension(system))
+    args = [gw_path, "read", temp_file, "--device", active_port(), "--format", fmt] + drive_arg()
+    
+    result = run_greaseweazle_command(gui, f"Read for compare ({fmt})", args)
+    if not result or not os.path.exists(temp_file):
+        gui.add_output_line("✗ Could not read the disk for comparison")
+        return False
+    
+    try:
+        started = time.perf_counter()
+        differences, compared, extra = compare_images(temp_file, reference, fmt)
+        elapsed = (time.perf_counter() - started) * 1000
+    except (OSError, ValueError) as e:
+        gui.add_output_line(f"✗ Comparison failed: {e}")
+        return False
+    finally:
+        remove_files(temp_file)
+    
+    gui.add_output_line(f"Compared {compared:,} sectors with {os.path.basename(reference)} in {elapsed:.1f} ms")
+    if extra:
+        gui.add_output_line(f"⚠ Sizes differ by {extra:,} bytes, only the common part was compared")
+    if not differences:
+        gui.add_output_line("✓ Disk matches sector for sector")
+        return not extra
+    
+    by_track = collections.defaultdict(list)
+    for cyl, head, sector in differences:
+        by_track[(cyl, head)].append(sector)
+    gui.add_output_line(f"✗ {len(differences)} sector(s) differ on {len(by_track)} track(s):")
+    for (cyl, head), sectors in sorted(by_track.items())[:COMPARE_REPORT_TRACKS]:
+        gui.add_output_line(f"  C{cyl:02d} H{head}: sector(s) {', '.join(map(str, sectors))}")
+    if len(by_track) > COMPARE_REPORT_TRACKS:
+        gui.add_output_line(f"  ... and {len(by_track) - COMPARE_REPORT_TRACKS} more track(s)")
+    return False
+
+def execute_compare_verify(gui):
+    """Choose what to compare the disk with, then run the comparison"""
+    formats = get_available_formats()
+    format_name = default_disk_size if default_disk_size in formats else next(iter(formats), None)
+    options = [("IMAGE", "📁 Choose an image file")]
+    if format_name and template_available(format_name):
+        options.insert(0, ("TEMPLATE", f"📋 {format_name} template"))
+    
+    source = select_option(gui, "COMPARE DISK WITH", options)
+    if source == "TEMPLATE":
+        gui.clear_output()
+        gui.add_output_line(f"COMPARE WITH {format_name} TEMPLATE")
+        fmt = formats[format_name][0]
+        reference = get_template_path(format_name)
+    elif source == "IMAGE":
+        gui.clear_output()
+        gui.add_output_line("Opening file browser...")
+        gui.refresh_all()
+        path = open_file_browser_safe(f"Select {target_system} image to compare",
+                                      get_file_extensions_for_system(target_system, "read"))
+        gui.stdscr.refresh()
+        if not path:
+            gui.add_output_line("No file selected")
+            return
+        try:
+            reference = decode_image(path, gui)
+        except (OSError, EOFError, ValueError, struct.error) as e:
+            gui.add_output_line(f"✗ Could not unpack {os.path.basename(path)}: {e}")
+            return
+        fmt = detect_write_format(gui, reference)
+    else:
+        gui.add_output_line("Selection cancelled")
+        return
+    
+    if not reference or not fmt:
+        gui.add_output_line("✗ No reference image or format to compare with")
+        return
+    perform_compare_verify(gui, reference, fmt)
+
+def execute_verify_disk(gui, verify_type):
+    """Execute disk verification"""
+    gui.clear_output()
+    gui.add_output_line("VERIFY DISK INTEGRITY")
+    gui.add_output_line(f"Type: {verify_type}")
+    
+    if verify_type == "COMPARE":
+        execute_compare_verify(gui)
+        gui.wait_for_continue()
+        return
+    
+    perform_verify_disk(gui, verify_type)
+    gui.wait_for_continue()
+
+# Pipelined repair: the disk is repaired a chunk of cylinders at a time
+# (write, read back, compare with the template), and only the tracks that
+# fail are erased and rewritten, so a marginal disk is never re-done whole
+REPAIR_CHUNK_CYLINDERS = 20
+REPAIR_RETRIES = 2  # Erase + rewrite attempts per failing track
+repair_status_marks = {"ok": ".", "retried": "r", "bad": "X", None: " "}
+
+def repair_tracks(gui, template_path, fmt, tracks, expected, erase):
+    """Write and read back tracks, returns the ones that did not verify, or None if cancelled"""
+    temp_file = temp_file_name("temp_repair_verify", os.path.splitext(template_path)[1] or ".img")
+    failed = []
+    for spec in track_ranges(tracks):
+        spec_cyls, spec_heads = parse_track_spec(spec)
+        spec_tracks = set(tracks) & {(cyl, head) for cyl in spec_cyls for head in spec_heads}
+        steps = [("Erase", [gw_path, "erase", "--device", active_port()])] if erase else []
+        steps += [("Write", [gw_path, "write", template_path, "--device", active_port(),
+                             "--format", fmt, "--no-verify"]),
+                  ("Read back", [gw_path, "read", temp_file, "--device", active_port(), "--format", fmt])]
+        
+        ok = True
+        for step, args in steps:
+            ok = run_greaseweazle_command(gui, f"Repair {spec} - {step}", args + drive_arg() + ["--tracks", spec])
+            if gui.last_exit_code is None:
+                remove_files(temp_file)
+                return None  # Cancelled or timed out
+            if not ok:
+                break
+        
+        try:
+            actual = track_checksums(temp_file, fmt, spec_tracks) if ok else {}
+        except (OSError, ValueError):
+            actual = {}
+        damaged = set(gui.progress.failed_tracks()) if ok and gui.progress else set()
+        # Tracks the template has no data for are only checked for read errors
+        failed += [key for key in spec_tracks
+                   if key in damaged or (key in expected and actual.get(key) != expected[key])]
+        remove_files(temp_file)
+    return sorted(failed)
+
+def perform_repair_disk(gui, format_name, system=None):
+    """Repair the disk chunk by chunk with the format's template, returns True if every track verified"""
+    system = system or target_system
+    formats = format_profiles.get(system, {})
+    if format_name not in formats:
+        gui.add_output_line(f"✗ Unknown format {format_name}")
+        return False
+    fmt = formats[format_name][0]
+    template_path = get_template_path(format_name, system)
+    layout = sector_layout(fmt)
+    if not template_path or not layout:
+        gui.add_output_line(f"✗ Template not available for {format_name}")
+        return False
+    
+    # Hash the raw sector data gw will write, not a container around it
+    try:
+        template_path = decode_image(template_path)
+        expected = track_checksums(template_path, fmt)
+    except (OSError, EOFError, ValueError, struct.error) as e:
+        gui.add_output_line(f"✗ Could not read template {os.path.basename(template_path)}: {e}")
+        return False
+    if len(expected) < len(layout):
+        gui.add_output_line(f"⚠ Template holds {len(expected)} of {len(layout)} tracks, "
+                            "the others are only checked for read errors")
+    status = {}
+    cylinders = sorted({cyl for cyl, head, spt in layout})
+    heads = sorted({head for cyl, head, spt in layout})
+    cancelled = False
+    
+    for start in range(0, len(cylinders), REPAIR_CHUNK_CYLINDERS):
+        chunk = set(cylinders[start:start + REPAIR_CHUNK_CYLINDERS])
+        pending = [(cyl, head) for cyl, head, spt in layout if cyl in chunk]
+        gui.add_output_line(f"CYLINDERS {min(chunk)}-{max(chunk)}")
+        
+        for attempt in range(REPAIR_RETRIES + 1):
+            failed = repair_tracks(gui, template_path, fmt, pending, expected, erase=attempt > 0)
+            if failed is None:
+                cancelled = True
+                break
+            for key in set(pending) - set(failed):
+                status[key] = "retried" if attempt else "ok"
+            pending = failed
+            if not pending or attempt == REPAIR_RETRIES:
+                break
+            gui.add_output_line(f"⚠ {len(pending)} track(s) failed, erasing and retrying")
+        if cancelled:
+            break
+        for key in pending:
+            status[key] = "bad"
+    
+    # Per-track map: one character per cylinder for each head
+    gui.add_output_line("")
+    gui.add_output_line("REPAIR REPORT (. ok, r rewritten, X bad)")
+    for head in heads:
+        for first in range(0, len(cylinders), 40):
+            row = cylinders[first:first + 40]
+            marks = "".join(repair_status_marks[status.get((cyl, head))] for cyl in row)
+            gui.add_output_line(f"H{head} C{row[0]:02d}-{row[-1]:02d}: {marks}")
+    
+    bad = sorted(key for key, value in status.items() if value == "bad")
+    retried = sum(1 for value in status.values() if value == "retried")
+    if cancelled:
+        gui.add_output_line(f"⚠ Repair stopped after {len(status)} of {len(layout)} tracks")
+    elif bad:
+        gui.add_output_line(f"✗ {len(bad)} physically bad track(s): "
+                            + ", ".join(f"T{cyl}.{head}" for cyl, head in bad[:20]))
+    else:
+        gui.add_output_line(f"✓ Disk repaired as {system} {format_name} ({retried} track(s) needed retries)")
+    log_operation(f"Repair {format_name}", "OK" if not bad and not cancelled else "FAILED",
+                  f"{len(bad)} bad, {retried} retried")
+    return not bad and not cancelled
+
+def execute_repair_disk(gui, format_name):
+    """FIXED: Execute complete repair sequence with --no-verify"""
+    gui.clear_output()
+    gui.add_output_line("REPAIR DISK SEQUENCE")
+    gui.add_output_line(f"Target: {target_system} {format_name}")
+    gui.add_output_line(f"Process: Write → Read back, {REPAIR_CHUNK_CYLINDERS} cylinders at a time")
+    gui.add_output_line("Failing tracks: Erase → Write → Read back, up to "
+                        f"{REPAIR_RETRIES} more times")
+    gui.add_output_line("⚠ Using --no-verify for format step")
+    gui.add_output_line("⚠ ALL DATA WILL BE LOST!")
+    gui.add_output_line("Press ENTER to start, ESC to cancel")
+    gui.refresh_all()
+    
+    while True:
+        try:
+            key = gui.stdscr.getch()
+            if key == 27:  # ESC
+                gui.add_output_line("Repair cancelled")
+                gui.wait_for_continue()
+                return
+            elif key == 10 or key == 13:  # ENTER
+                break
+        except curses.error:
+            continue
+    
+    # Determine format
+    if format_name == "AUTO":
+        format_name = default_disk_size or list(get_available_formats().keys())[0]
+    
+    perform_repair_disk(gui, format_name)
+    gui.wait_for_continue()
+
+# Persistent job queue: batched operations saved to queue_file after every
+# status change, so a crash or restart resumes at the first unfinished job
+JOB_PENDING = "pending"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+JOB_SKIPPED = "skipped"
+
+job_status_icons = {
+    JOB_PENDING: "⏳",
+    JOB_RUNNING: "►",
+    JOB_DONE: "✓",
+    JOB_FAILED: "✗",
+    JOB_SKIPPED: "–"
+}
+
+class JobQueue:
+    """Ordered list of queued operations persisted as JSON"""
+    
+    def __init__(self, path=queue_file):
+        self.path = path
+        self.jobs = []
+        self.next_id = 1
+        self.lock = threading.RLock()
+        self.load()
+    
+    def load(self):
+        """Load queue from disk, returning interrupted jobs to pending"""
+        if not os.path.exists(self.path):
+            return
+        
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self.jobs = data.get("jobs", [])
+            self.next_id = data.get("next_id", len(self.jobs) + 1)
+        except Exception:
+            # Start with an empty queue if the file is corrupted
+            self.jobs = []
+            return
+        
+        for job in self.jobs:
+            if job.get("status") == JOB_RUNNING:
+                job["status"] = JOB_PENDING
+                job["message"] = "Interrupted, will be resumed"
+    
+    def save(self):
+        """Write queue to disk atomically"""
+        with self.lock:
+            data = {"next_id": self.next_id, "jobs": self.jobs}
+            temp_path = self.path + ".tmp"
+            try:
+                with open(temp_path, "w", encoding="utf-8") as f:
+                    json.dump(data, f, indent=2)
+                os.replace(temp_path, self.path)
+            except Exception:
+                pass  # Silent fail for queue save
+    
+    def add(self, operation, params, label, prompt_swap=False):
+        """Append a job and persist the queue"""
+        with self.lock:
+            job = {
+                "id": self.next_id,
+                "operation": operation,
+                "params": params,
+                "label": label,
+                "prompt_swap": prompt_swap,
+                "status": JOB_PENDING,
+                "attempts": 0,
+                "message": "",
+                "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+                "finished": ""
+            }
+            self.next_id += 1
+            self.jobs.append(job)
+            self.save()
+            return job
+    
+    def pending(self):
+        """Jobs still waiting to run, in queue order"""
+        with self.lock:
+            return [job for job in self.jobs if job["status"] == JOB_PENDING]
+    
+    def claim_next(self, device_name=None):
+        """Mark the first pending job as running and return it
+        
+        Jobs pinned to a device (params["device"]) are only handed to that device.
+        """
+        with self.lock:
+            for job in self.jobs:
+                pinned = job["params"].get("device")
+                if pinned and device_name and pinned != device_name:
+                    continue
+                if job["status"] == JOB_PENDING:
+                    job["status"] = JOB_RUNNING
+                    job["attempts"] += 1
+                    self.save()
+                    return job
+            return None
+    
+    def set_status(self, job, status, message=""):
+        """Update a job's status and persist the queue"""
+        with self.lock:
+            job["status"] = status
+            job["message"] = message
+            if status in (JOB_DONE, JOB_FAILED, JOB_SKIPPED):
+                job["finished"] = time.strftime("%Y-%m-%d %H:%M:%S")
+            self.save()
+    
+    def retry_failed(self):
+        """Return failed and skipped jobs to pending, returns how many"""
+        with self.lock:
+            count = 0
+            for job in self.jobs:
+                if job["status"] in (JOB_FAILED, JOB_SKIPPED):
+                    job["status"] = JOB_PENDING
+                    job["message"] = ""
+                    count += 1
+            self.save()
+            return count
+    
+    def clear_finished(self):
+        """Drop completed jobs from the queue, returns how many"""
+        with self.lock:
+            before = len(self.jobs)
+            self.jobs = [job for job in self.jobs if job["status"] != JOB_DONE]
+            self.save()
+            return before - len(self.jobs)
+    
+    def counts(self):
+        """Number of jobs per status"""
+        with self.lock:
+            result = {status: 0 for status in job_status_icons}
+            for job in self.jobs:
+                result[job["status"]] = result.get(job["status"], 0) + 1
+            return result
+
+job_queue = None
+
+def get_job_queue():
+    """Get the job queue, loading it from disk on first use"""
+    global job_queue
+    if job_queue is None:
+        job_queue = JobQueue()
+    return job_queue
+
+def batch_paths(path, count):
+    """Numbered output paths (name_001.ext, ...) for a batch of count disks"""
+    if count <= 1:
+        return [path]
+    root, ext = os.path.splitext(path)
+    return [f"{root}_{i:03d}{ext}" for i in range(1, count + 1)]
+
+def run_job(gui, job):
+    """Run one queued job through the matching perform_* function"""
+    params = job["params"]
+    operation = job["operation"]
+    system = params.get("system")
+    
+    if operation == "backup":
+        return perform_backup_disk(gui, params["backup_type"], params["path"], system)
+    elif operation == "write":
+        return perform_write_image(gui, params["path"], params.get("gw_format"), system,
+                                   params.get("differential", False))
+    elif operation == "verify":
+        return perform_verify_disk(gui, params["verify_type"], system)
+    elif operation == "format":
+        return perform_format_disk(gui, params["format_name"], system)
+    elif operation == "clean":
+        return perform_clean_disk(gui)
+    
+    gui.add_output_line(f"✗ Unknown job operation: {operation}")
+    return False
+
+def prompt_disk_swap(gui, job):
+    """Ask for the next disk, returns 'run', 'skip' or 'pause'"""
+    gui.add_output_line("")
+    gui.add_output_line(f"⚠ Insert disk for: {job['label']}")
+    gui.add_output_line("ENTER: Start | S: Skip job | ESC: Pause queue")
+    gui.refresh_all()
+    
+    while True:
+        try:
+            key = gui.stdscr.getch()
+            if key == 10 or key == 13:  # ENTER
+                return "run"
+            elif key in (ord("s"), ord("S")):
+                return "skip"
+            elif key == 27:  # ESC
+                return "pause"
+            elif key == curses.KEY_RESIZE:
+                gui.handle_resize()
+                gui.refresh_all()
+        except curses.error:
+            continue
+
+def run_job_queue(gui):
+    """Run pending jobs back to back, prompting only for disk swaps"""
+    global operation_cancelled
+    queue_jobs = get_job_queue()
+    gui.clear_output()
+    gui.add_output_line("JOB QUEUE")
+    gui.add_output_line(f"Pending jobs: {len(queue_jobs.pending())}")
+    
+    completed = failed = 0
+    while True:
+        pending = queue_jobs.pending()
+        if not pending:
+            break
+        
+        job = pending[0]
+        if job.get("prompt_swap"):
+            choice = prompt_disk_swap(gui, job)
+            if choice == "pause":
+                gui.add_output_line("Queue paused, remaining jobs are kept")
+                break
+            if choice == "skip":
+                queue_jobs.set_status(job, JOB_SKIPPED, "Skipped by operator")
+                gui.add_output_line(f"– Skipped: {job['label']}")
+                continue
+        
+        job = queue_jobs.claim_next()
+        gui.add_output_line("")
+        gui.add_output_line(f"JOB {job['id']}: {job['label']}")
+        
+        # Only a cancel during this job counts, a job can fail before gw starts
+        # and would otherwise see the flag left over from an earlier operation
+        operation_cancelled = False
+        result = run_job(gui, job)
+        if operation_cancelled:
+            # Operator pressed ESC: keep the job for the next run
+            queue_jobs.set_status(job, JOB_PENDING, "Cancelled, will be retried")
+            gui.add_output_line("Queue paused after cancel")
+            break
+        
+        if result:
+            queue_jobs.set_status(job, JOB_DONE)
+            completed += 1
+        else:
+            queue_jobs.set_status(job, JOB_FAILED, "Operation failed")
+            failed += 1
+        log_operation(f"Queue job {job['id']}", "SUCCESS" if result else "FAILED", job["label"])
+    
+    gui.add_output_line("")
+    gui.add_output_line(f"Queue run finished: {completed} done, {failed} failed, "
+                        f"{len(queue_jobs.pending())} pending")
+    gui.wait_for_continue()
+
+def select_option(gui, title, options, selection=0):
+    """Let the user pick from (key, label) options, returns the key or None"""
+    while True:
+        gui.clear_output()
+        gui.add_output_line(title)
+        gui.add_output_line("=" * len(title))
+        
+        for i, (key, label) in enumerate(options):
+            marker = "►" if i == selection else " "
+            gui.add_output_line(f"{marker} {i+1}) {label}")
+        
+        gui.add_output_line("")
+        gui.add_output_line("↑↓: Navigate | ENTER: Select | ESC: Cancel")
+        gui.refresh_all()
+        
+        key = gui.stdscr.getch()
+        if key == curses.KEY_UP:
+            selection = max(0, selection - 1)
+        elif key == curses.KEY_DOWN:
+            selection = min(len(options) - 1, selection + 1)
+        elif key == 10 or key == 13:  # ENTER
+            return options[selection][0]
+        elif key == 27:  # ESC
+            return None
+
+def ask_number(gui, title, default=1, maximum=999):
+    """Prompt for a positive number typed on the keyboard, returns None on ESC"""
+    text = str(default)
+    typed = False
+    while True:
+        gui.clear_output()
+        gui.add_output_line(title)
+        gui.add_output_line("=" * len(title))
+        gui.add_output_line(f"Value: {text}_")
+        gui.add_output_line("")
+        gui.add_output_line(f"0-9: Type number (1-{maximum}) | BACKSPACE: Delete | ENTER: OK | ESC: Cancel")
+        gui.refresh_all()
+        
+        key = gui.stdscr.getch()
+        if ord("0") <= key <= ord("9"):
+            # The first digit replaces the suggested default
+            text = text if typed else ""
+            typed = True
+            if len(text) < len(str(maximum)):
+                text = (text + chr(key)).lstrip("0")
+        elif key in (curses.KEY_BACKSPACE, 8, 127):
+            typed = True
+            text = text[:-1]
+        elif (key == 10 or key == 13) and text and 1 <= int(text) <= maximum:
+            return int(text)
+        elif key == 27:  # ESC
+            return None
+
+def ask_text(gui, title, default=""):
+    """Prompt for a line of text typed on the keyboard, returns None on ESC"""
+    text = default
+    while True:
+        gui.clear_output()
+        gui.add_output_line(title)
+        gui.add_output_line("=" * len(title))
+        gui.add_output_line(f"Text: {text}_")
+        gui.add_output_line("")
+        gui.add_output_line("Type text | BACKSPACE: Delete | ENTER: OK | ESC: Cancel")
+        gui.refresh_all()
+        
+        key = gui.stdscr.getch()
+        if 32 <= key <= 126 and len(text) < 64:
+            text += chr(key)
+        elif key in (curses.KEY_BACKSPACE, 8, 127):
+            text = text[:-1]
+        elif (key == 10 or key == 13) and text.strip():
+            return text.strip()
+        elif key == 27:  # ESC
+            return None
+
+def queue_add_backup(gui):
+    """Enqueue a batch of backups with a disk swap prompt before each"""
+    backup_type = select_option(gui, "BATCH BACKUP TYPE", [
+        ("STANDARD", "💾 Standard Backup"),
+        ("FLUX", "🧲 Flux Backup"),
+        ("FLUX_IMAGE", "🧬 Flux + Image"),
+        ("AUTO_FORMAT", "🎯 Auto Format")
+    ])
+    if not backup_type:
+        return
+    
+    count = ask_number(gui, "NUMBER OF DISKS TO BACK UP", default=10)
+    if not count:
+        return
     
-    # FIXED: Write with format string and --no-verify
-    if detected_format:
-        args = [gw_path, "write", path, "--device", com_port, 
-                "--format", detected_format, "--no-verify"] + drive_arg()
-    else:
-        gui.add_output_line("✗ Could not determine format")
+    default_ext, filetypes, gw_format = get_backup_target(backup_type)
+    gui.clear_output()
+    gui.add_output_line("BATCH BACKUP")
+    gui.add_output_line("Choose the base file name, disks are numbered _001, _002...")
+    gui.refresh_all()
+    
+    path = open_file_browser_safe(f"Save {target_system} batch backup", filetypes, mode="save")
+    gui.stdscr.refresh()
+    if not path:
+        gui.add_output_line("No file selected")
         gui.wait_for_continue()
         return
     
-    result = run_greaseweazle_command(gui, f"Write {filename}", args)
+    if not path.lower().endswith(default_ext.lower()):
+        path += default_ext
     
-    if result:
-        gui.add_output_line("✓ Image written successfully")
-        gui.add_output_line("Disk is ready for use")
+    queue_jobs = get_job_queue()
+    paths = batch_paths(path, count)
+    for i, disk_path in enumerate(paths, 1):
+        queue_jobs.add("backup", {"backup_type": backup_type, "path": disk_path, "system": target_system},
+                       f"Backup {i}/{count} → {os.path.basename(disk_path)}", prompt_swap=True)
     
+    gui.add_output_line(f"✓ Queued {count} {backup_type.lower()} backup(s)")
+    gui.add_output_line(f"First: {os.path.basename(paths[0])}")
     gui.wait_for_continue()
 
-def execute_backup_disk(gui, backup_type):
-    """Execute backup operation"""
+def queue_add_write(gui):
+    """Enqueue one or more images, optionally several copies of each"""
     gui.clear_output()
-    gui.add_output_line("BACKUP DISK TO IMAGE")
-    gui.add_output_line(f"Type: {backup_type}")
-    gui.add_output_line("Opening save dialog...")
+    gui.add_output_line("BATCH WRITE")
+    gui.add_output_line("Opening file browser...")
     gui.refresh_all()
     
-    # Determine file extension and format
-    if backup_type == "FLUX":
-        default_ext = get_default_extension("FLUX")
-        filetypes = [("Flux Images", "*.scp"), ("All", "*.*")]
-        gw_format = "scp"
-    else:
-        default_ext = get_default_extension(target_system)
-        filetypes = get_file_extensions_for_system(target_system, "write")
-        
-        format_map = {
-            "PC": "ibm.1440",
-            "Amiga": None,
-            "Apple": None, 
-            "Atari": None,
-            "C64": None,
-            "ZXSpectrum": None
-        }
-        gw_format = format_map.get(target_system)
-    
-    path = open_file_browser_safe(f"Save {target_system} backup", filetypes, mode="save")
+    filetypes = get_file_extensions_for_system(target_system, "read")
+    paths = open_file_browser_safe(f"Select {target_system} disk images", filetypes, mode="multiple")
     gui.stdscr.refresh()
-    
-    if not path:
+    if not paths:
         gui.add_output_line("No file selected")
         gui.wait_for_continue()
         return
     
-    if not path.lower().endswith(default_ext.lower()):
-        path += default_ext
+    copies = ask_number(gui, "COPIES OF EACH IMAGE", default=1)
+    if not copies:
+        return
     
-    filename = os.path.basename(path)
-    gui.add_output_line(f"Backup to: {filename}")
+    mode = select_option(gui, "WRITE MODE", [
+        ("FULL", "📁 Write every track"),
+        ("DIFFERENTIAL", "🔀 Only tracks that differ (reused disks)")
+    ])
+    if not mode:
+        return
     
-    # Build command
-    if backup_type == "FLUX":
-        args = [gw_path, "read", path, "--device", com_port, "--format", "scp"] + drive_arg()
-    elif gw_format and target_system == "PC":
-        args = [gw_path, "read", path, "--device", com_port, "--format", gw_format] + drive_arg()
-    else:
-        args = [gw_path, "read", path, "--device", com_port] + drive_arg()
+    queue_jobs = get_job_queue()
+    total = len(paths) * copies
+    n = 0
+    for path in paths:
+        for copy in range(copies):
+            n += 1
+            queue_jobs.add("write", {"path": path, "system": target_system,
+                                     "differential": mode == "DIFFERENTIAL"},
+                           f"Write {n}/{total} ← {os.path.basename(path)}", prompt_swap=True)
+    
+    gui.clear_output()
+    gui.add_output_line("BATCH WRITE")
+    gui.add_output_line(f"✓ Queued {total} write job(s) from {len(paths)} image(s)")
+    gui.wait_for_continue()
+
+def queue_add_verify(gui):
+    """Enqueue verification of a stack of disks"""
+    verify_type = select_option(gui, "BATCH VERIFY TYPE", [
+        ("QUICK", "⚡ Quick Check"),
+        ("FULL", "🔍 Complete Verification"),
+        ("SAMPLED", "🎲 Sampled Verify")
+    ])
+    if not verify_type:
+        return
     
-    result = run_greaseweazle_command(gui, f"Backup to {filename}", args)
+    count = ask_number(gui, "NUMBER OF DISKS TO VERIFY", default=10)
+    if not count:
+        return
     
-    if result and os.path.exists(path):
-        final_size = os.path.getsize(path)
-        gui.add_output_line(f"✓ Backup completed: {final_size:,} bytes")
+    queue_jobs = get_job_queue()
+    for i in range(1, count + 1):
+        queue_jobs.add("verify", {"verify_type": verify_type, "system": target_system},
+                       f"Verify {i}/{count} ({verify_type.lower()})", prompt_swap=True)
     
+    gui.clear_output()
+    gui.add_output_line("BATCH VERIFY")
+    gui.add_output_line(f"✓ Queued {count} verification job(s)")
     gui.wait_for_continue()
 
-def execute_clean_disk(gui, format_type):
-    """Execute disk cleaning operation"""
+def show_job_queue(gui):
+    """List all jobs with their status"""
+    queue_jobs = get_job_queue()
     gui.clear_output()
-    gui.add_output_line("CLEAN DISK OPERATION")
-    gui.add_output_line(f"Format: {format_type}")
-    gui.add_output_line("⚠ WARNING: All data will be lost!")
-    gui.add_output_line("Press ENTER to confirm, ESC to cancel")
-    gui.refresh_all()
-    
-    while True:
-        try:
-            key = gui.stdscr.getch()
-            if key == 27:  # ESC
-                gui.add_output_line("Operation cancelled")
-                gui.wait_for_continue()
-                return
-            elif key == 10 or key == 13:  # ENTER
-                break
-        except curses.error:
-            continue
+    gui.add_output_line("JOB QUEUE")
+    gui.add_output_line("=" * 9)
     
-    args = [gw_path, "erase", "--device", com_port] + drive_arg()
-    result = run_greaseweazle_command(gui, "Clean Disk", args)
+    if not queue_jobs.jobs:
+        gui.add_output_line("Queue is empty")
     
-    if result:
-        gui.add_output_line("✓ Disk cleaned successfully")
+    for job in queue_jobs.jobs:
+        icon = job_status_icons.get(job["status"], "?")
+        line = f"{icon} #{job['id']} {job['label']}"
+        if job.get("message"):
+            line += f" - {job['message']}"
+        gui.add_output_line(line)
     
+    counts = queue_jobs.counts()
+    gui.add_output_line("")
+    gui.add_output_line(f"Pending: {counts[JOB_PENDING]} | Done: {counts[JOB_DONE]} | "
+                        f"Failed: {counts[JOB_FAILED]} | Skipped: {counts[JOB_SKIPPED]}")
     gui.wait_for_continue()
 
-def execute_verify_disk(gui, verify_type):
-    """Execute disk verification"""
-    gui.clear_output()
-    gui.add_output_line("VERIFY DISK INTEGRITY")
-    gui.add_output_line(f"Type: {verify_type}")
+def execute_queue_action(gui, option):
+    """Execute job queue submenu actions"""
+    queue_jobs = get_job_queue()
     
-    if verify_type == "COMPARE":
-        gui.add_output_line("Template comparison not available")
+    if option == "RUN":
+        run_job_queue(gui)
+    elif option == "RUN_PARALLEL":
+        run_parallel_queue(gui)
+    elif option == "ADD_BACKUP":
+        queue_add_backup(gui)
+    elif option == "ADD_WRITE":
+        queue_add_write(gui)
+    elif option == "ADD_VERIFY":
+        queue_add_verify(gui)
+    elif option == "SHOW":
+        show_job_queue(gui)
+    elif option == "RETRY":
+        count = queue_jobs.retry_failed()
+        gui.clear_output()
+        gui.add_output_line(f"✓ {count} failed/skipped job(s) returned to the queue")
+        gui.wait_for_continue()
+    elif option == "CLEAR":
+        count = queue_jobs.clear_finished()
+        gui.clear_output()
+        gui.add_output_line(f"✓ Removed {count} finished job(s)")
         gui.wait_for_continue()
-        return
-    
-    # Use proper file extension
-    ext = get_default_extension(target_system)
-    temp_file = f"temp_verify{ext}"
     
-    if verify_type == "QUICK":
-        args = [gw_path, "read", temp_file, "--device", com_port, "--tracks", "0-5"] + drive_arg()
-        title = "Quick Verify (6 tracks)"
-    else:  # FULL
-        args = [gw_path, "read", temp_file, "--device", com_port] + drive_arg()
-        title = "Full Verify (complete disk)"
+    # Return to the main menu if a helper was cancelled without output
+    if not gui.waiting_for_input:
+        gui.switch_to_main_menu()
+
+def show_catalogue_rows(gui, title, rows):
+    """List catalogue entries, with the image path under each"""
+    gui.clear_output()
+    gui.add_output_line(title)
+    gui.add_output_line("=" * len(title))
     
-    result = run_greaseweazle_command(gui, title, args)
+    if not rows:
+        gui.add_output_line("No matching catalogue entries")
     
-    if result and os.path.exists(temp_file):
-        file_size = os.path.getsize(temp_file)
-        gui.add_output_line(f"✓ Verification PASSED ({file_size:,} bytes)")
-        try:
-            os.remove(temp_file)
-        except:
-            pass
-    elif result:
-        gui.add_output_line("⚠ Verification completed but no data")
-    else:
-        gui.add_output_line("✗ Verification FAILED")
+    for row in rows:
+        gui.add_output_line(format_catalogue_row(row))
+        if row["path"]:
+            gui.add_output_line(f"    {row['path']}")
     
+    gui.add_output_line("")
+    gui.add_output_line(f"{len(rows)} entr{'y' if len(rows) == 1 else 'ies'} | Catalogue: {catalogue_file}")
     gui.wait_for_continue()
 
-def execute_repair_disk(gui, format_name):
-    """FIXED: Execute complete repair sequence with --no-verify"""
-    gui.clear_output()
-    gui.add_output_line("REPAIR DISK SEQUENCE")
-    gui.add_output_line(f"Target: {target_system} {format_name}")
-    gui.add_output_line("Process: Clean → Format → Verify")
-    gui.add_output_line("⚠ Using --no-verify for format step")
-    gui.add_output_line("⚠ ALL DATA WILL BE LOST!")
-    gui.add_output_line("Press ENTER to start, ESC to cancel")
-    gui.refresh_all()
+def execute_catalogue_action(gui, option):
+    """Execute catalogue submenu actions"""
+    if option == "SEARCH":
+        text = ask_text(gui, "SEARCH CATALOGUE (LABEL, FILE NAME OR HASH)")
+        if text:
+            show_catalogue_rows(gui, f"RESULTS FOR {text}", catalogue_search(text))
+    elif option == "HASH_FILE":
+        gui.clear_output()
+        gui.add_output_line("Opening file browser...")
+        gui.refresh_all()
+        path = open_file_browser_safe("Select an image to look up", [("All files", "*.*")])
+        gui.stdscr.refresh()
+        if path:
+            gui.add_output_line(f"Hashing {os.path.basename(path)}...")
+            gui.refresh_all()
+            hashes = file_hashes(path)
+            rows = catalogue_search(hashes["sha256"]) if hashes else []
+            show_catalogue_rows(gui, f"MATCHES FOR {os.path.basename(path)}", rows)
+    elif option == "RECENT":
+        show_catalogue_rows(gui, "RECENT OPERATIONS", catalogue_recent())
     
-    while True:
-        try:
-            key = gui.stdscr.getch()
-            if key == 27:  # ESC
-                gui.add_output_line("Repair cancelled")
-                gui.wait_for_continue()
-                return
-            elif key == 10 or key == 13:  # ENTER
+    # Return to the main menu if a helper was cancelled without output
+    if not gui.waiting_for_input:
+        gui.switch_to_main_menu()
+
+# Parallel operation: one worker thread per registered Greaseweazle device,
+# all pulling from the shared job queue
+WORKER_LOG_LINES = 200  # Output lines kept per device worker
+
+class DeviceWorker(threading.Thread):
+    """Runs queued jobs on one Greaseweazle device
+    
+    Provides the same add_output_line/refresh_all/poll_cancel_key interface as
+    the GUI, so the perform_* functions and run_greaseweazle_command drive it
+    unchanged.
+    """
+    
+    def __init__(self, device, queue_jobs):
+        super().__init__(daemon=True)
+        self.device = device
+        self.queue_jobs = queue_jobs
+        self.output_lines = collections.deque(maxlen=WORKER_LOG_LINES)
+        self.state = "idle"
+        self.job = None
+        self.progress = None
+        self.operation_in_progress = False
+        self.operation_start_time = None
+        self.last_exit_code = None
+        self.completed = 0
+        self.failed = 0
+        self.disk_ready = threading.Event()
+        self.skip_disk = False
+        self.stop_requested = threading.Event()
+        self.cancel_requested = threading.Event()
+    
+    def add_output_line(self, line):
+        """Add line to this device's output with timestamp"""
+        if line and not line.startswith("["):
+            line = f"[{time.strftime('%H:%M:%S')}] {line}"
+        self.output_lines.append(line)
+    
+    def refresh_all(self):
+        """Workers never draw, the device view polls them instead"""
+        pass
+    
+    def poll_cancel_key(self):
+        """True once the operator aborted this device's running job"""
+        return self.cancel_requested.is_set()
+    
+    def stop(self, abort=False):
+        """Stop after the current job, or abort it immediately"""
+        self.stop_requested.set()
+        if abort:
+            self.cancel_requested.set()
+        self.disk_ready.set()
+    
+    def wait_for_disk(self):
+        """Block until the operator confirms the disk swap, returns False to stop"""
+        self.state = "waiting"
+        self.disk_ready.clear()
+        self.disk_ready.wait()
+        return not self.stop_requested.is_set()
+    
+    def run(self):
+        """Worker loop: claim, (wait for disk), run, record"""
+        device_context.name = self.device["name"]
+        device_context.port = self.device["port"]
+        device_context.drive_type = self.device.get("drive_type", drive_type)
+        
+        while not self.stop_requested.is_set():
+            job = self.queue_jobs.claim_next(self.device["name"])
+            if not job:
                 break
-        except curses.error:
-            continue
+            self.job = job
+            
+            if job.get("prompt_swap") and not self.wait_for_disk():
+                self.queue_jobs.set_status(job, JOB_PENDING, "Stopped before start")
+                break
+            if self.skip_disk:
+                self.skip_disk = False
+                self.queue_jobs.set_status(job, JOB_SKIPPED, "Skipped by operator")
+                continue
+            
+            self.state = "running"
+            self.add_output_line(f"JOB {job['id']}: {job['label']}")
+            try:
+                result = run_job(self, job)
+            except Exception as e:
+                self.add_output_line(f"✗ Error: {e}")
+                result = False
+            
+            if self.cancel_requested.is_set():
+                self.queue_jobs.set_status(job, JOB_PENDING, "Cancelled, will be retried")
+                break
+            if result:
+                self.queue_jobs.set_status(job, JOB_DONE, f"on {self.device['name']}")
+                self.completed += 1
+            else:
+                self.queue_jobs.set_status(job, JOB_FAILED, f"Operation failed on {self.device['name']}")
+                self.failed += 1
+            log_operation(f"Queue job {job['id']} [{self.device['name']}]",
+                          "SUCCESS" if result else "FAILED", job["label"])
+        
+        self.job = None
+        self.state = "stopped"
     
-    # Determine format
-    if format_name == "AUTO":
-        format_name = default_disk_size or list(get_available_formats().keys())[0]
+    def status_lines(self, width):
+        """Lines describing this worker for the device view"""
+        device = self.device
+        header = f"{device['name']} {device['port']} (drive {device.get('drive_type', drive_type)})"
+        header += f" ✓{self.completed} ✗{self.failed}"
+        
+        if self.state == "waiting" and self.job:
+            lines = [f"⚠ {header}", f"   Insert disk for: {self.job['label']}"]
+        elif self.state == "running" and self.job:
+            lines = [f"► {header}", f"   {self.job['label']}"]
+            if self.progress:
+                lines.append("   " + self.progress.status_line(width - 3))
+        elif self.state == "stopped":
+            lines = [f"✓ {header}", "   Finished"]
+        else:
+            lines = [f"  {header}", "   Idle"]
+        
+        if self.output_lines and self.state == "running":
+            lines.append("   " + self.output_lines[-1])
+        return [line[:width] for line in lines]
+
+def run_parallel_queue(gui):
+    """Run the job queue on every registered device at once"""
+    registry = get_devices()
+    queue_jobs = get_job_queue()
+    gui.clear_output()
     
-    template_path = get_template_path(format_name)
-    if not template_path:
-        gui.add_output_line(f"✗ Template not available for {format_name}")
+    if not registry:
+        gui.add_output_line("✗ No devices configured")
+        gui.add_output_line("Add devices in Reconfigure → Devices")
         gui.wait_for_continue()
         return
-    
-    # Step 1: Clean
-    gui.add_output_line("STEP 1: CLEAN")
-    clean_args = [gw_path, "erase", "--device", com_port] + drive_arg()
-    if not run_greaseweazle_command(gui, "Repair - Clean", clean_args):
-        gui.add_output_line("✗ Repair failed at clean step")
+    if not queue_jobs.pending():
+        gui.add_output_line("Queue is empty, add jobs first")
         gui.wait_for_continue()
         return
     
-    # Step 2: Format with --no-verify
-    gui.add_output_line("STEP 2: FORMAT")
-    formats = get_available_formats()
-    fmt, filename, size = formats[format_name]
+    workers = [DeviceWorker(device, queue_jobs) for device in registry]
+    for worker in workers:
+        worker.start()
     
-    if fmt:
-        format_args = [gw_path, "write", template_path, "--device", com_port, 
-                      "--format", fmt, "--no-verify"] + drive_arg()
-    else:
-        gui.add_output_line(f"✗ No format string for {format_name}")
-        gui.wait_for_continue()
-        return
+    gui.operation_in_progress = True
+    stopping = False
+    try:
+        gui.stdscr.timeout(int(COMMAND_POLL_INTERVAL * 1000))
+        while any(worker.is_alive() for worker in workers):
+            width = max(20, gui.output_width - 6)
+            lines = [f"PARALLEL QUEUE: {len(workers)} device(s), {len(queue_jobs.pending())} job(s) pending", ""]
+            for i, worker in enumerate(workers, 1):
+                lines.extend([f"[{i}] " + worker.status_lines(width)[0]] + worker.status_lines(width)[1:])
+                lines.append("")
+            if stopping:
+                lines.append("⚠ Stopping after current jobs...")
+            else:
+                lines.append("1-9: Disk inserted | S: Skip disk | ESC: Stop after current | X: Abort all")
+            gui.set_output_lines(lines)
+            gui.refresh_all()
+            
+            try:
+                key = gui.stdscr.getch()
+            except curses.error:
+                continue
+            
+            waiting = [worker for worker in workers if worker.state == "waiting"]
+            if ord("1") <= key <= ord("9") and key - ord("1") < len(workers):
+                workers[key - ord("1")].disk_ready.set()
+            elif key in (ord("s"), ord("S")) and waiting:
+                waiting[0].skip_disk = True
+                waiting[0].disk_ready.set()
+            elif key == 27:  # ESC
+                stopping = True
+                for worker in workers:
+                    worker.stop()
+            elif key in (ord("x"), ord("X")):
+                stopping = True
+                for worker in workers:
+                    worker.stop(abort=True)
+            elif key == curses.KEY_RESIZE:
+                gui.handle_resize()
+    finally:
+        gui.stdscr.timeout(-1)
+        gui.operation_in_progress = False
     
-    if not run_greaseweazle_command(gui, "Repair - Format", format_args):
-        gui.add_output_line("✗ Repair failed at format step")
-        gui.wait_for_continue()
+    gui.clear_output()
+    gui.add_output_line("PARALLEL QUEUE FINISHED")
+    for worker in workers:
+        gui.add_output_line(f"• {worker.device['name']}: {worker.completed} done, {worker.failed} failed")
+    gui.add_output_line(f"Pending jobs: {len(queue_jobs.pending())}")
+    gui.wait_for_continue()
+
+def rescan_hardware(gui):
+    """Scan COM ports for Greaseweazles and select the device to use"""
+    global com_port
+    
+    gui.add_output_line("RESCAN HARDWARE")
+    gui.add_output_line("=" * 15)
+    try:
+        ports = serial.tools.list_ports.comports()
+    except Exception as e:
+        gui.add_output_line(f"✗ Could not scan COM ports: {e}")
         return
     
-    # Step 3: Verify
-    gui.add_output_line("STEP 3: VERIFY")
-    ext = get_default_extension(target_system)
-    temp_file = f"temp_repair_verify{ext}"
+    reasons = port_skip_reasons(ports)
+    candidates = [port for port in ports if not reasons[port.device]]
+    gui.add_output_line(f"{len(ports)} COM port(s), {len(candidates)} worth probing")
+    gui.refresh_all()
+    
+    found = []
+    if candidates:
+        with concurrent.futures.ThreadPoolExecutor(
+                max_workers=min(PROBE_MAX_WORKERS, len(candidates))) as executor:
+            futures = {executor.submit(read_device_info, port.device, port.serial_number, save=False): port
+                       for port in candidates}
+            for future in concurrent.futures.as_completed(futures):
+                port, info = futures[future], future.result()
+                if info:
+                    found.append((port.device, info))
+                    gui.add_output_line(f"✓ {port.device}: {info.get('model', 'Greaseweazle')}"
+                                        f" (firmware {info.get('firmware', '?')})")
+                else:
+                    gui.add_output_line(f"✗ {port.device}: Not Greaseweazle")
+                gui.refresh_all()
+        save_device_cache()
     
-    verify_args = [gw_path, "read", temp_file, "--device", com_port] + drive_arg()
-    verify_result = run_greaseweazle_command(gui, "Repair - Verify", verify_args)
+    if not found:
+        gui.add_output_line("")
+        gui.add_output_line("✗ No Greaseweazle devices found")
+        return
     
-    gui.add_output_line("REPAIR COMPLETE")
-    if verify_result:
-        gui.add_output_line(f"✓ Disk repaired as {target_system} {format_name}")
+    if len(found) == 1:
+        selected = found[0][0]
     else:
-        gui.add_output_line("⚠ Repair completed with verification issues")
+        found.sort()
+        selected = select_option(gui, "SELECT GREASEWEAZLE",
+                                 [(device, f"{device} - {info.get('model', 'Greaseweazle')}")
+                                  for device, info in found],
+                                 next((i for i, (device, _) in enumerate(found) if device == com_port), 0))
+        gui.clear_output()
+        if not selected:
+            gui.add_output_line("Selection cancelled")
+            return
     
-    try:
-        if os.path.exists(temp_file):
-            os.remove(temp_file)
-    except:
-        pass
+    com_port = selected
+    save_config()
+    gui.add_output_line("")
+    gui.add_output_line(f"✓ Using Greaseweazle on {com_port}")
+
+def manage_devices(gui):
+    """Add or remove devices from the registry"""
+    global devices
     
-    gui.wait_for_continue()
+    while True:
+        registry = get_devices()
+        options = [("ADD", "➕ Add device")]
+        for i, device in enumerate(registry):
+            options.append((i, f"✗ Remove {device['name']} ({device['port']}, drive {device.get('drive_type', 'B')})"))
+        options.append(("DONE", "✓ Done"))
+        
+        choice = select_option(gui, f"DEVICE REGISTRY ({len(registry)} device(s))", options)
+        if choice is None or choice == "DONE":
+            return
+        
+        if choice == "ADD":
+            try:
+                ports = [port.device for port in serial.tools.list_ports.comports()]
+            except Exception:
+                ports = []
+            used = {device["port"] for device in registry}
+            ports = [port for port in ports if port not in used]
+            if not ports:
+                gui.clear_output()
+                gui.add_output_line("✗ No unused COM ports found")
+                gui.wait_for_continue()
+                return
+            
+            port = select_option(gui, "SELECT PORT", [(port, port) for port in ports])
+            if not port:
+                continue
+            drive = select_option(gui, "SELECT DRIVE TYPE",
+                                  [(dt, f"{dt}) {drive_descriptions[dt]}") for dt in ["A", "B"]], 1)
+            if not drive:
+                continue
+            
+            names = {device["name"] for device in registry}
+            number = 1
+            while f"GW{number}" in names:
+                number += 1
+            devices = list(registry) + [{"name": f"GW{number}", "port": port, "drive_type": drive}]
+        else:
+            devices = [device for i, device in enumerate(registry) if i != choice]
+        save_config()
 
 # Menu generation functions
 def generate_clean_submenu():
@@ -2765,7 +6530,7 @@ def generate_format_submenu():
     items = []
     
     for format_name, (fmt, filename, size) in formats.items():
-        status = "✅" if get_template_path(format_name) else "❌"
+        status = "✅" if template_available(format_name) else "❌"
         name = f"{status} {target_system} {format_name}"
         if format_name == default_disk_size:
             name += " (Default)"
@@ -2779,7 +6544,9 @@ def generate_write_submenu():
     """Generate write image submenu"""
     return [
         ("SELECT_FILE", "📁 Select Image File", 
-         f"Browse and select a {target_system} disk image to write with --no-verify")
+         f"Browse and select a {target_system} disk image to write with --no-verify"),
+        ("DIFFERENTIAL", "🔀 Differential Write", 
+         "Read the disk first and rewrite only the tracks that differ")
     ]
 
 def generate_backup_submenu():
@@ -2789,6 +6556,8 @@ def generate_backup_submenu():
          "Filesystem backup, smaller files"),
         ("FLUX", "🧲 Flux Backup", 
          "Raw data backup, preserves copy protection"),
+        ("FLUX_IMAGE", "🧬 Flux + Image", 
+         "One flux read, decoded to the best sector format offline"),
         ("AUTO_FORMAT", f"🎯 Auto {target_system}", 
          f"Detect and use optimal {target_system} format")
     ]
@@ -2800,6 +6569,8 @@ def generate_verify_submenu():
          "Fast verification of critical areas"),
         ("FULL", "🔍 Complete Verification", 
          "Full disk scan with bad sector mapping"),
+        ("SAMPLED", "🎲 Sampled Verify", 
+         f"{verify_sample_tracks} tracks spread over the disk within {verify_time_budget}s, with a health score"),
         ("COMPARE", "📊 Template Compare", 
          f"Compare against {target_system} template")
     ]
@@ -2811,7 +6582,7 @@ def generate_repair_submenu():
              f"Automatic repair using {default_disk_size or 'default'} format with --no-verify")]
     
     for format_name in formats.keys():
-        status = "✅" if get_template_path(format_name) else "❌"
+        status = "✅" if template_available(format_name) else "❌"
         name = f"{status} Repair as {format_name}"
         if format_name == default_disk_size:
             name += " (Default)"
@@ -2821,6 +6592,39 @@ def generate_repair_submenu():
     
     return items
 
+def generate_queue_submenu():
+    """Generate job queue submenu"""
+    counts = get_job_queue().counts()
+    return [
+        ("RUN", f"▶ Run Queue ({counts[JOB_PENDING]} pending)", 
+         "Run all pending jobs back to back, prompting only for disk swaps"),
+        ("RUN_PARALLEL", f"⚡ Run on All Devices ({len(get_devices())})", 
+         "Share the queue between all registered Greaseweazles"),
+        ("ADD_BACKUP", "💾 Add Batch Backup", 
+         f"Queue numbered backups of many {target_system} disks"),
+        ("ADD_WRITE", "📁 Add Batch Write", 
+         "Queue one or more images, optionally several copies each"),
+        ("ADD_VERIFY", "🔍 Add Batch Verify", 
+         "Queue verification of a stack of disks"),
+        ("SHOW", "📋 Show Queue", 
+         "List queued jobs and their status"),
+        ("RETRY", f"🔁 Retry Failed ({counts[JOB_FAILED] + counts[JOB_SKIPPED]})", 
+         "Return failed and skipped jobs to the queue"),
+        ("CLEAR", f"🧹 Clear Finished ({counts[JOB_DONE]})", 
+         "Remove completed jobs from the queue file")
+    ]
+
+def generate_catalogue_submenu():
+    """Generate catalogue submenu"""
+    return [
+        ("SEARCH", "🔎 Search", 
+         "Find images by volume label, file name or hash"),
+        ("HASH_FILE", "🧾 Look Up File", 
+         "Hash an image file and list every operation with the same contents"),
+        ("RECENT", "🕘 Recent Operations", 
+         "The latest backups, writes and verifies")
+    ]
+
 # Main program functions
 def handle_main_menu_selection(gui, selection):
     """Handle main menu item selection"""
@@ -2845,8 +6649,14 @@ def handle_main_menu_selection(gui, selection):
              "Scan COM ports for Greaseweazle devices"),
             ("TEST_CONNECTION", "🔧 Test Connection", 
              "Test current device and show info"),
+            ("DEVICES", f"🔌 Devices ({len(get_devices())})", 
+             "Register extra Greaseweazles for parallel jobs"),
             ("CHECK_TEMPLATES", "📋 Check Templates", 
-             "Verify template files present and valid")
+             "Verify template files present and valid"),
+            ("FLUX_COMPRESSION", f"🗜️ Flux Compression: {flux_compression}", 
+             "Compress flux backups in the background"),
+            ("VERIFY_SAMPLING", f"🎲 Sampled Verify: {verify_sample_tracks} tracks / {verify_time_budget}s", 
+             "Sample size and time budget of Sampled Verify")
         ])
     elif key == "1":  # Clean
         gui.show_submenu(generate_clean_submenu())
@@ -2865,11 +6675,19 @@ def handle_main_menu_selection(gui, selection):
         gui.add_output_line(f"• System: {target_system}")
         gui.add_output_line(f"• Drive: {drive_descriptions[drive_type]}")
         gui.add_output_line(f"• COM Port: {com_port or 'Not set'}")
+        for device in devices:
+            gui.add_output_line(f"• Device {device['name']}: {device['port']} (drive {device['drive_type']})")
         gui.add_output_line(f"• Default Size: {default_disk_size or 'Not set'}")
         gui.add_output_line(f"• Formats Available: {len(get_available_formats())}")
+        gui.add_output_line(f"• Queued Jobs: {len(get_job_queue().pending())} pending")
+        gui.add_output_line(f"• Flux Compression: {flux_compression} ({pending_compressions()} running)")
         gui.wait_for_continue()
     elif key == "7":  # Repair
         gui.show_submenu(generate_repair_submenu())
+    elif key == "Q":  # Job queue
+        gui.show_submenu(generate_queue_submenu())
+    elif key == "C":  # Catalogue
+        gui.show_submenu(generate_catalogue_submenu())
     elif key == "H":  # Help
         gui.switch_to_help_topics()
     elif key == "0":  # Exit
@@ -2900,8 +6718,14 @@ def handle_main_menu_selection(gui, selection):
              "Scan COM ports for Greaseweazle devices"),
             ("TEST_CONNECTION", "🔧 Test Connection", 
              "Test current device and show info"),
+            ("DEVICES", f"🔌 Devices ({len(get_devices())})", 
+             "Register extra Greaseweazles for parallel jobs"),
             ("CHECK_TEMPLATES", "📋 Check Templates", 
-             "Verify template files present and valid")
+             "Verify template files present and valid"),
+            ("FLUX_COMPRESSION", f"🗜️ Flux Compression: {flux_compression}", 
+             "Compress flux backups in the background"),
+            ("VERIFY_SAMPLING", f"🎲 Sampled Verify: {verify_sample_tracks} tracks / {verify_time_budget}s", 
+             "Sample size and time budget of Sampled Verify")
         ])
     elif key == "1":  # Clean
         gui.show_submenu(generate_clean_submenu())
@@ -2920,11 +6744,19 @@ def handle_main_menu_selection(gui, selection):
         gui.add_output_line(f"• System: {target_system}")
         gui.add_output_line(f"• Drive: {drive_descriptions[drive_type]}")
         gui.add_output_line(f"• COM Port: {com_port or 'Not set'}")
+        for device in devices:
+            gui.add_output_line(f"• Device {device['name']}: {device['port']} (drive {device['drive_type']})")
         gui.add_output_line(f"• Default Size: {default_disk_size or 'Not set'}")
         gui.add_output_line(f"• Formats Available: {len(get_available_formats())}")
+        gui.add_output_line(f"• Queued Jobs: {len(get_job_queue().pending())} pending")
+        gui.add_output_line(f"• Flux Compression: {flux_compression} ({pending_compressions()} running)")
         gui.wait_for_continue()
     elif key == "7":  # Repair
         gui.show_submenu(generate_repair_submenu())
+    elif key == "Q":  # Job queue
+        gui.show_submenu(generate_queue_submenu())
+    elif key == "C":  # Catalogue
+        gui.show_submenu(generate_catalogue_submenu())
     elif key == "H":  # Help
         gui.switch_to_help_topics()
     elif key == "0":  # Exit
@@ -2956,12 +6788,17 @@ def handle_submenu_selection(gui, main_selection, sub_selection):
         execute_verify_disk(gui, sub_key)
     elif key == "7":  # Repair
         execute_repair_disk(gui, sub_key)
+    elif key == "Q":  # Job queue
+        execute_queue_action(gui, sub_key)
+    elif key == "C":  # Catalogue
+        execute_catalogue_action(gui, sub_key)
     
     return True
 
 def execute_reconfigure(gui, option):
     """Execute reconfigure operations"""
-    global target_system, drive_type, default_disk_size
+    global target_system, drive_type, default_disk_size, flux_compression
+    global verify_sample_tracks, verify_time_budget
     
     gui.clear_output()
     
@@ -3018,7 +6855,7 @@ def execute_reconfigure(gui, option):
             
             for i, size in enumerate(sizes):
                 marker = "►" if i == selection else " "
-                status = "✓" if get_template_path(size) else "✗"
+                status = "✓" if template_available(size) else "✗"
                 gui.add_output_line(f"{marker} {i+1}) {size} {status}")
             
             gui.add_output_line("")
@@ -3071,6 +6908,87 @@ def execute_reconfigure(gui, option):
                 gui.add_output_line("Selection cancelled")
                 break
     
+    elif option == "RESCAN_HARDWARE":
+        rescan_hardware(gui)
+    
+    elif option == "TEST_CONNECTION":
+        gui.add_output_line("TEST CONNECTION")
+        gui.add_output_line("=" * 15)
+        if not com_port:
+            gui.add_output_line("✗ No device configured, use Rescan Hardware")
+        else:
+            gui.add_output_line(f"Testing {com_port}...")
+            gui.refresh_all()
+            info = read_device_info(com_port, port_serial(com_port), refresh=True)
+            if info:
+                gui.add_output_line(f"✓ Greaseweazle responding on {com_port}")
+                for line in info["info"][:6]:
+                    gui.add_output_line(f"  {line.strip()}")
+            else:
+                gui.add_output_line(f"✗ No Greaseweazle responding on {com_port}")
+                gui.add_output_line("Check the cable, or use Rescan Hardware if the port changed")
+    
+    elif option == "CHECK_TEMPLATES":
+        template_index.refresh(force=True)
+        formats = get_available_formats()
+        gui.add_output_line(f"TEMPLATES FOR {target_system.upper()}")
+        gui.add_output_line("=" * (14 + len(target_system)))
+        
+        present = 0
+        for format_name, (fmt, filename, size) in formats.items():
+            candidate = find_template(format_name)
+            actual_size = template_index.size(filename)
+            if candidate and candidate.member:
+                present += 1
+                gui.add_output_line(f"✓ {format_name}: {candidate.label()}")
+            elif candidate:
+                present += 1
+                gui.add_output_line(f"✓ {format_name}: {candidate.name} sha256 {template_index.checksum(candidate.name)[:16]}")
+            elif can_synthesize(fmt):
+                present += 1
+                gui.add_output_line(f"✓ {format_name}: blank image generated on demand")
+            elif actual_size is not None:
+                gui.add_output_line(f"⚠ {format_name}: {filename} is {actual_size:,} bytes, expected {size:,}")
+            else:
+                gui.add_output_line(f"✗ {format_name}: no {size:,} byte image found")
+        
+        gui.add_output_line("")
+        gui.add_output_line(f"{present} of {len(formats)} templates ready in {TEMPLATE_DIR}/")
+    
+    elif option == "DEVICES":
+        manage_devices(gui)
+        gui.clear_output()
+        gui.add_output_line("DEVICE REGISTRY")
+        gui.add_output_line("=" * 15)
+        for device in get_devices():
+            gui.add_output_line(f"• {device['name']}: {device['port']} (drive {device['drive_type']})")
+        gui.add_output_line("")
+        gui.add_output_line("Job Queue → Run on All Devices uses every device listed")
+    
+    elif option == "FLUX_COMPRESSION":
+        methods = list(flux_compressors)
+        choice = select_option(gui, "FLUX COMPRESSION",
+                               [(method, f"{method}: {description}")
+                                for method, (suffix, description) in flux_compressors.items()],
+                               methods.index(flux_compression) if flux_compression in methods else 0)
+        if choice:
+            flux_compression = choice
+            save_config()
+            gui.add_output_line(f"✓ Flux compression: {flux_compressors[choice][1]}")
+        else:
+            gui.add_output_line("Selection cancelled")
+    
+    elif option == "VERIFY_SAMPLING":
+        tracks = ask_number(gui, "TRACKS TO SAMPLE", default=verify_sample_tracks)
+        budget = ask_number(gui, "TIME BUDGET (SECONDS)", default=verify_time_budget, maximum=3600) if tracks else None
+        gui.clear_output()
+        if tracks and budget:
+            verify_sample_tracks, verify_time_budget = tracks, budget
+            save_config()
+            gui.add_output_line(f"✓ Sampled verify: {tracks} tracks within {budget}s")
+        else:
+            gui.add_output_line("Selection cancelled")
+    
     gui.wait_for_continue()
 
 def main_program_loop(stdscr):
@@ -3120,6 +7038,16 @@ def main_program_loop(stdscr):
         curses.doupdate()
     
     gui.switch_to_main_menu()
+    start_hotplug_monitor()
+    
+    # Point out jobs left unfinished by a previous session
+    pending_jobs = len(get_job_queue().pending())
+    if pending_jobs:
+        gui.clear_output()
+        gui.add_output_line("JOB QUEUE")
+        gui.add_output_line(f"⚠ {pending_jobs} unfinished job(s) from a previous session")
+        gui.add_output_line("Open [Q] Job Queue → Run Queue to resume")
+        gui.wait_for_continue()
     
     # Main program loop
     running = True
@@ -3127,10 +7055,20 @@ def main_program_loop(stdscr):
         gui.refresh_all()
         
         try:
+            # Wake up every second so hotplug changes show in the header
+            stdscr.timeout(1000)
+            device_state = (com_port, device_connected())
             key = stdscr.getch()
+            while key == -1 and device_state == (com_port, device_connected()):
+                key = stdscr.getch()
         except KeyboardInterrupt:
             operation_cancelled = True
             continue
+        finally:
+            stdscr.timeout(-1)
+        
+        if key == -1:
+            continue
         
         if key == curses.KEY_RESIZE:
             gui.handle_resize()
@@ -3205,6 +7143,10 @@ def main_program_loop(stdscr):
 def main():
     """FIXED: Main entry point with comprehensive error handling"""
     try:
+        exit_code = run_catalogue_cli(sys.argv[1:])
+        if exit_code is not None:
+            sys.exit(exit_code)
+        
         if not sys.stdout.isatty():
             print("Error: This program requires a terminal")
             print("Please run from command line or terminal")
@@ -3215,6 +7157,11 @@ def main():
         
         curses.wrapper(main_program_loop)
         
+        if pending_compressions():
+            print(f"Finishing {pending_compressions()} background compression(s)...")
+        if finish_flux_compression():
+            print("⚠ Some flux captures could not be compressed and were left as .scp")
+        
         print("\nHollik's Greaseweazle Helper v1.0 terminated normally")
         print("Configuration saved. Thank you for using the helper!")
         print("\nKey improvements in this version:")
@@ -3231,6 +7178,8 @@ def main():
         print(f"\nFatal error: {e}")
         print("Please check your configuration and try again")
         sys.exit(1)
+    finally:
+        remove_scratch_dir()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file